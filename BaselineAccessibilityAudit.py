@@ -7,8 +7,15 @@ OSMP Baseline Accessibility Audit - Batch Layer File Processor
 
 import arcpy
 import csv
+import json
 import os
 import logging
+import logging.handlers
+import multiprocessing
+import queue
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # -----------------------------
@@ -16,6 +23,27 @@ from datetime import datetime
 # -----------------------------
 LAYER_FILES_ROOT = r"E:\Layers"
 OUTPUT_FOLDER = r"Y:\LayerAudit\Baseline Audits"
+# Worker processes (1 = process files serially, in this process). Opt-in: spawned workers
+# relaunch sys.executable, which under ArcGIS Pro is ArcGISPro.exe unless
+# multiprocessing.set_executable() points at python.exe, and each one checks out its own
+# arcpy license; keep within arcpy license seats
+N_CPUS = 1
+CHUNKSIZE = 8  # layer files handed to a worker per dispatch
+# Threads fetching CIM definitions ahead of analysis. arcpy.mp layer objects are not
+# documented as thread-safe, so this is opt-in (1 = fetch inline, on the calling thread)
+CIM_PREFETCH_THREADS = 1
+CSV_BUFFER_SIZE = 1 << 20  # bytes buffered in memory before the CSV hits disk
+CSV_QUEUE_SIZE = 1024  # layer files' rows queued for the CSV writer thread
+USE_CACHE = True  # reuse rows for layer files unchanged since the previous run
+CACHE_FILENAME = "audit_cache.json"  # stored in the output folder
+CACHE_VERSION = 1  # bump whenever the analyzers or CSV columns change, so stale rows are dropped
+LOG_BUFFER_RECORDS = 1024  # log records held in memory before they are written out
+LOG_BUFFER_SIZE = 1 << 16  # bytes buffered by the log file stream
+
+# Light fill colors flagged by estimate_contrast_issues; any color sharing
+# a 4-char prefix with one of these counts as light too
+LIGHT_SET = frozenset(['#ffffff', '#ffff00', '#00ffff', '#ffffe0'])
+LIGHT_PREFIXES = frozenset(c[:4] for c in LIGHT_SET)
 
 # -----------------------------
 # Helpers: paths & logging
@@ -33,16 +61,47 @@ def get_desktop_folder():
             return p
     return home
 
+class BufferedFileHandler(logging.FileHandler):
+    """FileHandler with a large write buffer that only flushes on ERROR records or flush()"""
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=LOG_BUFFER_SIZE, encoding=self.encoding)
+
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= logging.ERROR:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+def add_log_file_handler(log_path, mode):
+    """Attach a batched DEBUG-level file handler for log_path to the root logger"""
+    file_handler = BufferedFileHandler(log_path, mode=mode, encoding="utf-8")
+    file_handler.setFormatter(logging.Formatter('%(asctime)s | %(levelname)s | %(message)s'))
+    # Hold records in memory and hand them over in batches; an ERROR flushes immediately
+    memory_handler = logging.handlers.MemoryHandler(
+        capacity=LOG_BUFFER_RECORDS, flushLevel=logging.ERROR, target=file_handler
+    )
+    root = logging.getLogger('')
+    root.setLevel(logging.DEBUG)
+    root.addHandler(memory_handler)
+
+def flush_log():
+    """Push buffered records (and the file buffer behind them) to disk"""
+    for handler in logging.getLogger('').handlers:
+        handler.flush()
+        target = getattr(handler, "target", None)
+        if target is not None:
+            target.flush()
+
 def setup_logging():
     output_dir = OUTPUT_FOLDER if OUTPUT_FOLDER else get_desktop_folder()
     log_fname = "OSMP_Batch_Audit_{}.log".format(datetime.now().strftime('%Y%m%d_%H%M%S'))
     log_path = os.path.join(output_dir, log_fname)
-    logging.basicConfig(
-        filename=log_path,
-        filemode='w',
-        level=logging.DEBUG,
-        format='%(asctime)s | %(levelname)s | %(message)s'
-    )
+    # logging.shutdown() at interpreter exit flushes whatever is still buffered
+    add_log_file_handler(log_path, 'w')
     # also log to console
     console = logging.StreamHandler()
     console.setLevel(logging.INFO)
@@ -53,294 +112,364 @@ def setup_logging():
     return log_path
 
 def find_layer_files(root_dir):
-    """Recursively find all .lyr and .lyrx files, excluding _Archive paths"""
+    """Recursively find all .lyr and .lyrx files, excluding _Archive directories"""
     layer_files = []
     skipped_archive_count = 0
     
-    for dirpath, dirnames, filenames in os.walk(root_dir):
-        # Skip any directory with _Archive in its path
-        if "_Archive" in dirpath:
-            skipped_archive_count += 1
-            continue
-            
-        for filename in filenames:
-            if filename.lower().endswith(('.lyr', '.lyrx')):
-                full_path = os.path.join(dirpath, filename)
-                layer_files.append(full_path)
+    # Stack-based walk with os.scandir: entry.is_dir()/is_file() use the
+    # directory listing's file type, so no extra stat() per entry
+    stack = [root_dir]
+    while stack:
+        current_dir = stack.pop()
+        try:
+            with os.scandir(current_dir) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        # Prune _Archive directories (and everything below them)
+                        if "_Archive" in entry.name:
+                            skipped_archive_count += 1
+                            continue
+                        stack.append(entry.path)
+                    elif entry.name.lower().endswith(('.lyr', '.lyrx')):
+                        layer_files.append(entry.path)
+        except OSError as e:
+            logging.warning("Could not read directory {}: {}".format(current_dir, e))
     
     if skipped_archive_count > 0:
-        logging.info("Skipped {} directories containing '_Archive' in path".format(skipped_archive_count))
+        logging.info("Skipped {} directories containing '_Archive' in their name".format(skipped_archive_count))
     
     return layer_files
 
 # -----------------------------
 # Color and CIM helpers
 # -----------------------------
+# Two-char lowercase hex for every channel value
+_HEX = tuple("{:02x}".format(i) for i in range(256))
+
 def rgb_to_hex(rgb):
-    """rgb: iterable of ints or floats (0-255 or 0-1) -> '#rrggbb'"""
+    """rgb: iterable of ints (0-255) or floats (0-255 or 0-1) -> '#rrggbb'"""
     try:
-        r, g, b = rgb[:3]
-        # if floats 0..1, convert
-        if 0.0 <= r <= 1.0 and 0.0 <= g <= 1.0 and 0.0 <= b <= 1.0:
-            r, g, b = int(round(r * 255)), int(round(g * 255)), int(round(b * 255))
+        r, g, b = rgb[0], rgb[1], rgb[2]
+        if isinstance(r, float):
+            # floats 0..1 are fractions of 255
+            if 0.0 <= r <= 1.0 and 0.0 <= g <= 1.0 and 0.0 <= b <= 1.0:
+                r, g, b = int(r * 255 + 0.5), int(g * 255 + 0.5), int(b * 255 + 0.5)
+            else:
+                r, g, b = int(r + 0.5), int(g + 0.5), int(b + 0.5)
         else:
-            r, g, b = int(round(r)), int(round(g)), int(round(b))
-        return "#{:02x}{:02x}{:02x}".format(r, g, b)
+            r, g, b = int(r), int(g), int(b)
+        return "#" + _HEX[r & 255] + _HEX[g & 255] + _HEX[b & 255]
     except Exception:
         return ""
 
+_MISSING = object()
+
 def safe_get(obj, attr, default=None):
+    """dict key or attribute lookup; never raises"""
+    # JSON-shaped CIM pieces come back as plain dicts: a key lookup is the
+    # cheap path, and avoids getattr hitting dict methods such as .items/.values
+    if type(obj) is dict:
+        return obj.get(attr, default)
     try:
-        return getattr(obj, attr)
+        value = getattr(obj, attr, _MISSING)
     except Exception:
-        try:
-            return obj.get(attr, default)
-        except Exception:
-            return default
+        # some arcpy properties raise something other than AttributeError
+        value = _MISSING
+    if value is not _MISSING:
+        return value
+    if isinstance(obj, dict):
+        return obj.get(attr, default)
+    return default
+
+def safe_get_first(obj, attrs, default=None):
+    """First truthy safe_get(obj, attr) over attrs, without probing the rest"""
+    for attr in attrs:
+        value = safe_get(obj, attr)
+        if value:
+            return value
+    return default
+
+def fetch_layer_definition(layer):
+    """layer.getDefinition("V2"), or None if the CIM can't be read"""
+    try:
+        return layer.getDefinition("V2")
+    except Exception as e:
+        logging.debug("getDefinition failed for %s: %s", getattr(layer, "name", "UNKNOWN"), e)
+        return None
+
+_CIM_EXECUTOR = None
+
+def _get_cim_executor():
+    """Per-process thread pool for CIM prefetching, created on first use"""
+    global _CIM_EXECUTOR
+    if _CIM_EXECUTOR is None:
+        _CIM_EXECUTOR = ThreadPoolExecutor(max_workers=CIM_PREFETCH_THREADS)
+    return _CIM_EXECUTOR
+
+def _iter_symbol_properties(sym):
+    """Yield (color_hex, width, opacity) for each symbol layer of a CIM symbol"""
+    try:
+        slayers = safe_get(sym, "symbolLayers")
+        if slayers is None:
+            return
+        for sl in slayers:
+            col = None
+            if hasattr(sl, "color"):
+                col_attr = safe_get(sl, "color")
+                if hasattr(col_attr, "values"):
+                    col = col_attr.values
+            elif isinstance(sl, dict) and "color" in sl and "values" in sl["color"]:
+                col = sl["color"]["values"]
+            yield (rgb_to_hex(col) if col else ""), safe_get(sl, "width"), safe_get(sl, "opacity")
+    except Exception as ee:
+        logging.debug("Error extracting from cim symbol layers: %s", ee)
+
+def _iter_renderer_properties(cim_renderer):
+    """Yield (color_hex, width, opacity) across a CIM renderer's symbol, or its groups' symbols"""
+    cim_symbol = safe_get(cim_renderer, "symbol")
+    if cim_symbol:
+        yield from _iter_symbol_properties(cim_symbol)
+        return
+    groups = safe_get(cim_renderer, "groups") or safe_get(cim_renderer, "classBreaks")
+    if groups:
+        for group in groups:
+            sym = safe_get(group, "symbol")
+            if sym:
+                yield from _iter_symbol_properties(sym)
+
+def _iter_item_symbols(renderer):
+    """Yield the symbol of every item in every group of a high-level renderer"""
+    for group in safe_get(renderer, "groups") or ():
+        for item in safe_get(group, "items") or ():
+            yield safe_get(item, "symbol")
 
 # -----------------------------
 # Analyzer functions
 # -----------------------------
-def analyze_symbology(layer):
+# Analyzer results - one namedtuple per analyzer, fields in CSV column order
+SymInfo = namedtuple("SymInfo", "symbol_type colors uses_multiple_colors color_notes line_widths transparency sym_notes")
+LabelInfo = namedtuple("LabelInfo", "labels_enabled font_name font_size font_bold font_color halo_enabled halo_color halo_size label_notes")
+PopupInfo = namedtuple("PopupInfo", "popup_enabled popup_fields popup_notes")
+
+# Alternate property names, tried in order, across CIM/arcpy versions
+_FONT_NAME_ATTRS = ("fontName", "name", "family")
+_FONT_SIZE_ATTRS = ("height", "size")
+_HALO_SIZE_ATTRS = ("size", "width")
+_POPUP_FIELD_ATTRS = ("fieldName", "field")
+_POPUP_CONTENT_ATTRS = ("description", "content")
+
+def analyze_symbology(layer, cim=None):
     """
-    Returns dict:
-    {
+    cim: the layer's CIM definition (layer.getDefinition("V2")), or None
+    Returns SymInfo:
+    (
       symbol_type, colors (list hex), uses_multiple_colors (bool),
       color_notes, line_widths (list), transparency (0-100 or ''), sym_notes
-    }
+    )
     """
-    info = {
-        "symbol_type": "",
-        "colors": [],
-        "uses_multiple_colors": False,
-        "color_notes": "",
-        "line_widths": [],
-        "transparency": "",
-        "sym_notes": ""
-    }
+    symbol_type = ""
+    colors = []
+    uses_multiple_colors = False
+    color_notes = ""
+    line_widths = []
+    transparency = ""
+    sym_notes = ""
 
     try:
-        # Primary approach: layer.symbology (high-level API)
-        if hasattr(layer, "symbology") and layer.symbology is not None:
+        # Primary approach: layer.symbology (high-level API); the property is
+        # built on each access, so read it once
+        sym = safe_get(layer, "symbology")
+        if sym is not None:
             try:
-                sym = layer.symbology
                 renderer = safe_get(sym, "renderer")
                 if renderer:
-                    info["symbol_type"] = safe_get(renderer, "type") or info["symbol_type"]
+                    symbol_type = safe_get(renderer, "type") or symbol_type
                     # SimpleRenderer
-                    if info["symbol_type"] == "SimpleRenderer":
+                    if symbol_type == "SimpleRenderer":
                         sym_symbol = safe_get(renderer, "symbol")
                         if sym_symbol and hasattr(sym_symbol, "color"):
                             col = safe_get(sym_symbol.color, "RGB", None)
                             if col:
-                                info["colors"].append(rgb_to_hex(col))
+                                colors.append(rgb_to_hex(col))
                         # Try stroke/width on symbol layers if present
-                        try:
-                            for sl in getattr(sym_symbol, "symbolLayers", []) or []:
+                        slayers = safe_get(sym_symbol, "symbolLayers")
+                        if slayers:
+                            for sl in slayers:
                                 width = safe_get(sl, "width")
                                 if width:
-                                    info["line_widths"].append(str(width))
-                        except Exception:
-                            pass
+                                    line_widths.append(str(width))
 
                     # UniqueValueRenderer / ClassBreaksRenderer
-                    elif info["symbol_type"] in ("UniqueValueRenderer", "ClassBreaksRenderer"):
-                        info["uses_multiple_colors"] = True
+                    elif symbol_type in ("UniqueValueRenderer", "ClassBreaksRenderer"):
+                        uses_multiple_colors = True
                         # iterate groups/items if available
-                        try:
-                            groups = safe_get(renderer, "groups") or []
-                            for group in groups:
-                                items = safe_get(group, "items") or []
-                                for item in items:
-                                    s = safe_get(item, "symbol")
-                                    if s and hasattr(s, "color"):
-                                        col = safe_get(s.color, "RGB", None)
-                                        if col:
-                                            hexc = rgb_to_hex(col)
-                                            if hexc not in info["colors"]:
-                                                info["colors"].append(hexc)
-                                    # try symbolLayers for width
-                                    try:
-                                        for sl in getattr(s, "symbolLayers", []) or []:
-                                            width = safe_get(sl, "width")
-                                            if width:
-                                                info["line_widths"].append(str(width))
-                                    except Exception:
-                                        pass
-                        except Exception:
-                            pass
+                        seen = set(colors)
+                        for s in _iter_item_symbols(renderer):
+                            if s and hasattr(s, "color"):
+                                col = safe_get(s.color, "RGB", None)
+                                if col:
+                                    hexc = rgb_to_hex(col)
+                                    if hexc not in seen:
+                                        seen.add(hexc)
+                                        colors.append(hexc)
+                            # try symbolLayers for width
+                            slayers = safe_get(s, "symbolLayers")
+                            if slayers:
+                                for sl in slayers:
+                                    width = safe_get(sl, "width")
+                                    if width:
+                                        line_widths.append(str(width))
 
             except Exception as e:
-                logging.debug("layer.symbology parsing error for {}: {}".format(layer.name, e))
+                logging.debug("layer.symbology parsing error for %s: %s", layer.name, e)
 
         # Fallback: try CIM - this often yields colors, opacities, widths
-        if not info["colors"] or not info["line_widths"] or info["transparency"] == "":
+        if cim is not None and (not colors or not line_widths or transparency == ""):
             try:
-                cim = layer.getDefinition("V2")
                 # Opacity: CIM layer may have opacity (0..100)
-                try:
-                    opacity = safe_get(cim, "opacity")
-                    if opacity is not None:
-                        info["transparency"] = str(opacity)
-                except Exception:
-                    pass
+                opacity = safe_get(cim, "opacity")
+                if opacity is not None:
+                    transparency = str(opacity)
 
-                # Renderer + symbol
+                # Renderer + symbol(s)
                 cim_renderer = safe_get(cim, "renderer") or safe_get(cim, "Renderer")
                 if cim_renderer:
-                    cim_symbol = safe_get(cim_renderer, "symbol")
-                    
-                    def _extract_from_cim_symbol(sym):
-                        try:
-                            slayers = safe_get(sym, "symbolLayers") or []
-                            for sl in slayers:
-                                col = None
-                                if hasattr(sl, "color"):
-                                    col_attr = safe_get(sl, "color")
-                                    if hasattr(col_attr, "values"):
-                                        col = col_attr.values
-                                elif isinstance(sl, dict) and "color" in sl and "values" in sl["color"]:
-                                    col = sl["color"]["values"]
-                                if col:
-                                    hexc = rgb_to_hex(col)
-                                    if hexc and hexc not in info["colors"]:
-                                        info["colors"].append(hexc)
-                                width = safe_get(sl, "width")
-                                if width:
-                                    info["line_widths"].append(str(width))
-                                sl_op = safe_get(sl, "opacity")
-                                if sl_op is not None and info["transparency"] == "":
-                                    info["transparency"] = str(sl_op)
-                        except Exception as ee:
-                            logging.debug("Error extracting from cim symbol layers: {}".format(ee))
-
-                    if cim_symbol:
-                        _extract_from_cim_symbol(cim_symbol)
-                    else:
-                        try:
-                            groups = safe_get(cim_renderer, "groups") or safe_get(cim_renderer, "classBreaks") or []
-                            for group in groups:
-                                sym = safe_get(group, "symbol")
-                                if sym:
-                                    _extract_from_cim_symbol(sym)
-                        except Exception:
-                            pass
+                    seen = set(colors)
+                    for hexc, width, sl_op in _iter_renderer_properties(cim_renderer):
+                        if hexc and hexc not in seen:
+                            seen.add(hexc)
+                            colors.append(hexc)
+                        if width:
+                            line_widths.append(str(width))
+                        if sl_op is not None and transparency == "":
+                            transparency = str(sl_op)
             except Exception as e:
-                logging.debug("CIM fallback error: {}".format(e))
+                logging.debug("CIM fallback error: %s", e)
 
         # Final notes & checks
-        if len(info["colors"]) >= 2:
-            try:
-                has_red = any(c.lower().startswith("#ff") for c in info["colors"])
-                has_green = any(c.lower()[1:3] == "00" and c.lower()[3:5] == "ff" for c in info["colors"])
-                if has_red and has_green:
-                    info["color_notes"] = "WARNING: Red/green combination detected (color blind issue)"
-            except Exception:
-                pass
+        if len(colors) >= 2:
+            # rgb_to_hex already returns lowercase hex, so slice directly
+            has_red = any(c[:3] == "#ff" for c in colors)
+            has_green = any(c[1:5] == "00ff" for c in colors)
+            if has_red and has_green:
+                color_notes = "WARNING: Red/green combination detected (color blind issue)"
 
-        # dedupe line widths
-        info["line_widths"] = sorted(set(info["line_widths"]), key=lambda x: float(x) if x.replace('.','',1).isdigit() else x)
+        # dedupe line widths (first occurrence wins), parsing each one once;
+        # non-numeric widths sort last instead of failing a float/str comparison
+        width_keys = {}
+        for w in line_widths:
+            if w not in width_keys:
+                try:
+                    width_keys[w] = float(w)
+                except ValueError:
+                    width_keys[w] = float("inf")
+        line_widths = sorted(width_keys, key=width_keys.get)
 
     except Exception as e:
-        info["sym_notes"] = "Error analyzing symbology: {}".format(e)
+        sym_notes = "Error analyzing symbology: {}".format(e)
         logging.exception("analyze_symbology failure")
 
-    return info
+    return SymInfo(symbol_type, colors, uses_multiple_colors, color_notes, line_widths, transparency, sym_notes)
 
-def analyze_labels(layer):
+def analyze_labels(layer, cim=None):
     """
-    Returns dict:
-    {
+    cim: the layer's CIM definition (layer.getDefinition("V2")), or None
+    Returns LabelInfo:
+    (
       labels_enabled, font_name, font_size, font_bold, font_color,
       halo_enabled, halo_color, halo_size, label_notes
-    }
+    )
     """
-    info = {
-        "labels_enabled": False,
-        "font_name": "",
-        "font_size": "",
-        "font_bold": "Unknown",  # Changed default to track if we found anything
-        "font_color": "",
-        "halo_enabled": "Unknown",  # Changed default to track if we found anything
-        "halo_color": "",
-        "halo_size": "",
-        "label_notes": ""
-    }
+    labels_enabled = False
+    font_name = ""
+    font_size = ""
+    font_bold = "Unknown"  # Changed default to track if we found anything
+    font_color = ""
+    halo_enabled = "Unknown"  # Changed default to track if we found anything
+    halo_color = ""
+    halo_size = ""
+    label_notes = ""
     try:
         # Check if labels are enabled
+        show_labels = None
         try:
             if hasattr(layer, "showLabels"):
-                info["labels_enabled"] = bool(layer.showLabels)
-                logging.debug("  Layer {} - showLabels: {}".format(layer.name, layer.showLabels))
+                show_labels = layer.showLabels
+                labels_enabled = bool(show_labels)
+                logging.debug("  Layer %s - showLabels: %s", layer.name, show_labels)
         except Exception as e:
-            logging.debug("  Error checking showLabels: {}".format(e))
+            logging.debug("  Error checking showLabels: %s", e)
+
+        # Labels switched off draw nothing, so there is no label styling to audit
+        if show_labels is not None and not labels_enabled:
+            return LabelInfo(False, "", "", "No", "", "No", "", "", "")
 
         # Try to get label class info via high-level API
         try:
-            if hasattr(layer, "labelClasses") and len(layer.labelClasses) > 0:
-                lc = layer.labelClasses[0]
-                logging.debug("  Found labelClasses, count: {}".format(len(layer.labelClasses)))
+            label_classes = getattr(layer, "labelClasses", None)
+            if label_classes is not None and len(label_classes) > 0:
+                lc = label_classes[0]
+                logging.debug("  Found labelClasses, count: %s", len(label_classes))
                 
-                if hasattr(lc, "textSymbol"):
-                    ts = lc.textSymbol
+                ts = safe_get(lc, "textSymbol")
+                if ts is not None:
                     
                     # Font properties
                     f = safe_get(ts, "font")
                     if f:
-                        info["font_name"] = safe_get(f, "name") or info["font_name"]
+                        font_name = safe_get(f, "name") or font_name
                         size = safe_get(f, "size")
                         if size is not None:
-                            info["font_size"] = str(size)
+                            font_size = str(size)
                         
                         # Check bold - try multiple approaches
                         bold_val = safe_get(f, "bold")
                         if bold_val is not None:
-                            info["font_bold"] = "Yes" if bool(bold_val) else "No"
-                            logging.debug("  Font bold from high-level API: {}".format(bold_val))
+                            font_bold = "Yes" if bool(bold_val) else "No"
+                            logging.debug("  Font bold from high-level API: %s", bold_val)
                         
                         # Check weight property
                         weight_val = safe_get(f, "weight")
-                        if weight_val is not None and info["font_bold"] == "Unknown":
-                            info["font_bold"] = "Yes" if weight_val >= 600 else "No"
-                            logging.debug("  Font bold from weight: {}".format(weight_val))
+                        if weight_val is not None and font_bold == "Unknown":
+                            font_bold = "Yes" if weight_val >= 600 else "No"
+                            logging.debug("  Font bold from weight: %s", weight_val)
                         
                         style = safe_get(f, "style")
-                        if style and "bold" in str(style).lower() and info["font_bold"] == "Unknown":
-                            info["font_bold"] = "Yes"
-                            logging.debug("  Font bold detected in style: {}".format(style))
+                        if style and "bold" in str(style).lower() and font_bold == "Unknown":
+                            font_bold = "Yes"
+                            logging.debug("  Font bold detected in style: %s", style)
                     
                     # Font color
                     col = safe_get(ts, "color")
                     if col and hasattr(col, "RGB"):
-                        info["font_color"] = rgb_to_hex(col.RGB)
+                        font_color = rgb_to_hex(col.RGB)
                     
                     # Halo - check multiple properties
                     halo = safe_get(ts, "haloSymbol")
                     if halo is not None:
-                        info["halo_enabled"] = "Yes"
+                        halo_enabled = "Yes"
                         logging.debug("  Halo detected via high-level API haloSymbol")
                         if hasattr(halo, "color") and hasattr(halo.color, "RGB"):
-                            info["halo_color"] = rgb_to_hex(halo.color.RGB)
+                            halo_color = rgb_to_hex(halo.color.RGB)
                         hs = safe_get(halo, "size")
                         if hs is not None:
-                            info["halo_size"] = str(hs)
+                            halo_size = str(hs)
                     else:
                         # Check if halo size exists even without haloSymbol object
-                        halo_size = safe_get(ts, "haloSize")
-                        if halo_size is not None and halo_size > 0:
-                            info["halo_enabled"] = "Yes"
-                            info["halo_size"] = str(halo_size)
-                            logging.debug("  Halo detected via haloSize property: {}".format(halo_size))
-                        elif info["halo_enabled"] == "Unknown":
-                            info["halo_enabled"] = "No"
+                        size_prop = safe_get(ts, "haloSize")
+                        if size_prop is not None and size_prop > 0:
+                            halo_enabled = "Yes"
+                            halo_size = str(size_prop)
+                            logging.debug("  Halo detected via haloSize property: %s", size_prop)
+                        elif halo_enabled == "Unknown":
+                            halo_enabled = "No"
                             
         except Exception as e:
-            logging.debug("  labelClasses parse error: {}".format(e))
+            logging.debug("  labelClasses parse error: %s", e)
 
         # CIM fallback - try to get more info
-        if info["font_name"] == "" or info["font_size"] == "" or info["font_bold"] == "Unknown" or info["halo_enabled"] == "Unknown":
+        if cim is not None and (font_name == "" or font_size == "" or font_bold == "Unknown" or halo_enabled == "Unknown"):
             try:
-                cim = layer.getDefinition("V2")
                 label_classes = safe_get(cim, "labelClasses") or []
                 if label_classes:
                     lc = label_classes[0]
@@ -348,121 +477,124 @@ def analyze_labels(layer):
                     if textsym:
                         # Font
                         font_obj = safe_get(textsym, "font") or {}
-                        name = safe_get(font_obj, "fontName") or safe_get(font_obj, "name") or safe_get(font_obj, "family")
-                        size = safe_get(font_obj, "height") or safe_get(font_obj, "size")
+                        name = safe_get_first(font_obj, _FONT_NAME_ATTRS)
+                        size = safe_get_first(font_obj, _FONT_SIZE_ATTRS)
                         
-                        if name and not info["font_name"]:
-                            info["font_name"] = name
-                        if size and not info["font_size"]:
-                            info["font_size"] = str(size)
+                        if name and not font_name:
+                            font_name = name
+                        if size and not font_size:
+                            font_size = str(size)
                         
                         # Check for bold in CIM - multiple possible locations
-                        if info["font_bold"] == "Unknown":
+                        if font_bold == "Unknown":
                             # Check weight
                             weight = safe_get(font_obj, "weight")
                             if weight is not None:
                                 # Weight values: 400=normal, 700=bold
-                                info["font_bold"] = "Yes" if weight >= 600 else "No"
-                                logging.debug("  CIM font weight: {} -> bold={}".format(weight, info["font_bold"]))
+                                font_bold = "Yes" if weight >= 600 else "No"
+                                logging.debug("  CIM font weight: %s -> bold=%s", weight, font_bold)
                             else:
                                 # Check bold property directly
                                 bold_prop = safe_get(font_obj, "bold")
                                 if bold_prop is not None:
-                                    info["font_bold"] = "Yes" if bold_prop else "No"
-                                    logging.debug("  CIM font bold property: {}".format(bold_prop))
+                                    font_bold = "Yes" if bold_prop else "No"
+                                    logging.debug("  CIM font bold property: %s", bold_prop)
                                 else:
                                     # Check decoration or style
                                     decoration = safe_get(font_obj, "decoration")
                                     if decoration and "bold" in str(decoration).lower():
-                                        info["font_bold"] = "Yes"
+                                        font_bold = "Yes"
                                         logging.debug("  CIM font decoration indicates bold")
                                     else:
                                         # Still unknown - check font family name
                                         if name and any(x in name.lower() for x in ["bold", "heavy", "black"]):
-                                            info["font_bold"] = "Yes"
-                                            logging.debug("  Font name suggests bold: {}".format(name))
+                                            font_bold = "Yes"
+                                            logging.debug("  Font name suggests bold: %s", name)
                                         else:
-                                            info["font_bold"] = "No"  # Default to No if we've checked everything
+                                            font_bold = "No"  # Default to No if we've checked everything
                         
                         # Color
                         col = safe_get(textsym, "color")
-                        if col and safe_get(col, "values") and not info["font_color"]:
-                            info["font_color"] = rgb_to_hex(col["values"] if isinstance(col, dict) else col.values)
+                        if col and safe_get(col, "values") and not font_color:
+                            font_color = rgb_to_hex(col["values"] if isinstance(col, dict) else col.values)
                         
                         # Halo - check CIM multiple ways
-                        if info["halo_enabled"] == "Unknown":
+                        if halo_enabled == "Unknown":
                             halo = safe_get(textsym, "haloSymbol")
                             if halo:
-                                info["halo_enabled"] = "Yes"
+                                halo_enabled = "Yes"
                                 logging.debug("  Halo detected via CIM haloSymbol")
                                 hcol = safe_get(halo, "color")
-                                if hcol and safe_get(hcol, "values") and not info["halo_color"]:
-                                    info["halo_color"] = rgb_to_hex(hcol["values"] if isinstance(hcol, dict) else hcol.values)
-                                hs = safe_get(halo, "size") or safe_get(halo, "width")
-                                if hs and not info["halo_size"]:
-                                    info["halo_size"] = str(hs)
+                                if hcol and safe_get(hcol, "values") and not halo_color:
+                                    halo_color = rgb_to_hex(hcol["values"] if isinstance(hcol, dict) else hcol.values)
+                                hs = safe_get_first(halo, _HALO_SIZE_ATTRS)
+                                if hs and not halo_size:
+                                    halo_size = str(hs)
                             else:
                                 # Check haloSize property directly
-                                halo_size = safe_get(textsym, "haloSize")
-                                if halo_size is not None and halo_size > 0:
-                                    info["halo_enabled"] = "Yes"
-                                    info["halo_size"] = str(halo_size)
-                                    logging.debug("  CIM haloSize property: {}".format(halo_size))
+                                size_prop = safe_get(textsym, "haloSize")
+                                if size_prop is not None and size_prop > 0:
+                                    halo_enabled = "Yes"
+                                    halo_size = str(size_prop)
+                                    logging.debug("  CIM haloSize property: %s", size_prop)
                         
                         # Also check symbolLayers for halo
-                        if info["halo_enabled"] == "Unknown":
+                        if halo_enabled == "Unknown":
                             sym_layers = safe_get(textsym, "symbolLayers") or []
                             for sl in sym_layers:
                                 sl_type = safe_get(sl, "type") or ""
                                 if "halo" in sl_type.lower():
-                                    info["halo_enabled"] = "Yes"
-                                    logging.debug("  Halo detected in CIM symbolLayers type: {}".format(sl_type))
+                                    halo_enabled = "Yes"
+                                    logging.debug("  Halo detected in CIM symbolLayers type: %s", sl_type)
                                     # Try to get halo size from symbol layer
-                                    hs = safe_get(sl, "size") or safe_get(sl, "width")
-                                    if hs and not info["halo_size"]:
-                                        info["halo_size"] = str(hs)
+                                    hs = safe_get_first(sl, _HALO_SIZE_ATTRS)
+                                    if hs and not halo_size:
+                                        halo_size = str(hs)
                                     break
                             
                             # If still unknown after all checks
-                            if info["halo_enabled"] == "Unknown":
-                                info["halo_enabled"] = "No"
+                            if halo_enabled == "Unknown":
+                                halo_enabled = "No"
                                 
             except Exception as e:
-                logging.debug("  CIM label fallback error: {}".format(e))
+                logging.debug("  CIM label fallback error: %s", e)
         
         # Set final defaults if still unknown
-        if info["font_bold"] == "Unknown":
-            info["font_bold"] = "No"
-        if info["halo_enabled"] == "Unknown":
-            info["halo_enabled"] = "No"
+        if font_bold == "Unknown":
+            font_bold = "No"
+        if halo_enabled == "Unknown":
+            halo_enabled = "No"
 
         # Font size check
         try:
-            if info["font_size"]:
-                fnum = float(info["font_size"])
+            if font_size:
+                fnum = float(font_size)
                 if fnum < 10:
-                    info["label_notes"] = "WARNING: Font size below 10pt may be too small"
+                    label_notes = "WARNING: Font size below 10pt may be too small"
         except Exception:
             pass
 
     except Exception as e:
-        info["label_notes"] = "Error analyzing labels: {}".format(e)
+        label_notes = "Error analyzing labels: {}".format(e)
         logging.exception("analyze_labels failed")
 
-    return info
+    return LabelInfo(labels_enabled, font_name, font_size, font_bold, font_color, halo_enabled, halo_color, halo_size, label_notes)
+
+# Field types / names never shown as popup attributes
+_SKIP_FIELD_TYPES = frozenset(("OID", "OID64", "GEOMETRY", "BLOB", "RASTER"))
+_SKIP_FIELD_NAMES = frozenset(("shape", "shape_length", "shape_area", "objectid", "fid"))
 
-def analyze_popups(layer):
+def analyze_popups(layer, cim=None):
     """
-    Returns:
-    {
+    cim: the layer's CIM definition (layer.getDefinition("V2")), or None
+    Returns PopupInfo:
+    (
       popup_enabled(bool or ''), popup_fields(list of names), popup_notes
-    }
+    )
     """
-    info = {
-        "popup_enabled": "Not stored in layer file",
-        "popup_fields": [],
-        "popup_notes": ""
-    }
+    popup_enabled = "Not stored in layer file"
+    popup_fields = []
+    popup_notes = ""
     
     notes = []
     
@@ -470,41 +602,17 @@ def analyze_popups(layer):
         # Try to get popup enabled status
         try:
             if hasattr(layer, "showPopups"):
-                info["popup_enabled"] = "Yes" if bool(layer.showPopups) else "No"
-                logging.debug("  showPopups property found: {}".format(layer.showPopups))
+                show_popups = layer.showPopups
+                popup_enabled = "Yes" if bool(show_popups) else "No"
+                logging.debug("  showPopups property found: %s", show_popups)
         except Exception as e:
-            logging.debug("  showPopups not accessible: {}".format(e))
+            logging.debug("  showPopups not accessible: %s", e)
 
-        # Get available fields from the layer
-        field_count = 0
-        visible_field_count = 0
-        try:
-            if hasattr(layer, "listFields"):
-                fields = layer.listFields()
-                field_count = len(fields)
-                visible_names = []
-                for f in fields:
-                    # Count fields that would typically be shown in popups
-                    if f.type.upper() not in ("OID", "OID64", "GEOMETRY", "BLOB", "RASTER") and \
-                       f.name.lower() not in ("shape", "shape_length", "shape_area", "objectid", "fid"):
-                        visible_names.append(f.name)
-                        visible_field_count += 1
-                info["popup_fields"] = visible_names
-                
-                if visible_field_count > 0:
-                    notes.append("{} potential popup fields available".format(visible_field_count))
-                else:
-                    notes.append("No standard attribute fields found")
-                    
-        except Exception as e:
-            logging.debug("  listFields issue: {}".format(e))
-            notes.append("Could not access field list")
-
-        # Try to extract CIM popup configuration
+        # CIM popup configuration first - it is authoritative for visible fields
         has_popup_config = False
+        cim_notes = []
+        visible_in_popup = []
         try:
-            cim = layer.getDefinition("V2")
-            
             # Check for popupInfo in CIM
             popup_info = safe_get(cim, "popupInfo")
             if popup_info:
@@ -513,56 +621,82 @@ def analyze_popups(layer):
                 # Check if popup is explicitly enabled/disabled
                 enabled = safe_get(popup_info, "popupsEnabled")
                 if enabled is not None:
-                    info["popup_enabled"] = "Yes" if enabled else "No"
+                    popup_enabled = "Yes" if enabled else "No"
                 
                 # Get field configurations
                 field_infos = safe_get(popup_info, "fieldInfos") or []
-                visible_in_popup = []
                 for fi in field_infos:
                     visible = safe_get(fi, "visible")
                     if visible is None or visible:  # Default to visible if not specified
-                        fld = safe_get(fi, "fieldName") or safe_get(fi, "field")
+                        fld = safe_get_first(fi, _POPUP_FIELD_ATTRS)
                         if fld and fld not in visible_in_popup:
                             visible_in_popup.append(fld)
                 
                 if visible_in_popup:
-                    info["popup_fields"] = visible_in_popup
-                    notes.append("{} fields configured in popup".format(len(visible_in_popup)))
+                    popup_fields = visible_in_popup
+                    cim_notes.append("{} fields configured in popup".format(len(visible_in_popup)))
                 
                 # Check for custom HTML content
-                desc = safe_get(popup_info, "description") or safe_get(popup_info, "content")
+                desc = safe_get_first(popup_info, _POPUP_CONTENT_ATTRS)
                 if desc and len(str(desc).strip()) > 0:
-                    notes.append("Custom HTML/text content detected")
+                    cim_notes.append("Custom HTML/text content detected")
                     if "<img" in str(desc).lower():
-                        notes.append("WARNING: Images in popup - verify alt text")
+                        cim_notes.append("WARNING: Images in popup - verify alt text")
                     if "color:" in str(desc).lower() or "style=" in str(desc).lower():
-                        notes.append("WARNING: Custom styling - verify contrast")
+                        cim_notes.append("WARNING: Custom styling - verify contrast")
                 
                 # Check popup title
                 title = safe_get(popup_info, "title")
                 if title:
-                    notes.append("Has custom popup title")
+                    cim_notes.append("Has custom popup title")
                     
                 # Check for media (charts, images, etc.)
                 media = safe_get(popup_info, "mediaInfos") or []
                 if media and len(media) > 0:
-                    notes.append("WARNING: Contains {} media element(s) - verify accessibility".format(len(media)))
+                    cim_notes.append("WARNING: Contains {} media element(s) - verify accessibility".format(len(media)))
                     
         except Exception as e:
-            logging.debug("  CIM popup analysis error: {}".format(e))
+            logging.debug("  CIM popup analysis error: %s", e)
+
+        # Get available fields from the layer - skipped when the CIM popup already
+        # lists its visible fields, since each field touch is an arcpy round trip
+        if not visible_in_popup:
+            visible_field_count = 0
+            try:
+                if hasattr(layer, "listFields"):
+                    fields = list(layer.listFields())
+                    visible_names = []
+                    for f in fields:
+                        # Count fields that would typically be shown in popups
+                        name = f.name
+                        if f.type.upper() not in _SKIP_FIELD_TYPES and name.lower() not in _SKIP_FIELD_NAMES:
+                            visible_names.append(name)
+                            visible_field_count += 1
+                    popup_fields = visible_names
+                    
+                    if visible_field_count > 0:
+                        notes.append("{} potential popup fields available".format(visible_field_count))
+                    else:
+                        notes.append("No standard attribute fields found")
+                        
+            except Exception as e:
+                logging.debug("  listFields issue: %s", e)
+                notes.append("Could not access field list")
+
+        notes.extend(cim_notes)
 
         # Final assessment
-        if not has_popup_config and info["popup_enabled"] == "Not stored in layer file":
+        if not has_popup_config and popup_enabled == "Not stored in layer file":
             notes.append("Popup config not found in layer file - check in map document")
         
         # Combine notes
-        info["popup_notes"] = "; ".join(notes) if notes else "No popup configuration issues detected"
+        popup_notes = "; ".join(notes) if notes else "No popup configuration issues detected"
 
     except Exception as e:
-        info["popup_notes"] = "Error analyzing popups: {}".format(e)
+        popup_notes = "Error analyzing popups: {}".format(e)
         logging.exception("analyze_popups failed")
 
-    return info
+    return PopupInfo(popup_enabled, popup_fields, popup_notes)
 
 def estimate_contrast_issues(sym_info, label_info):
     """
@@ -573,16 +707,14 @@ def estimate_contrast_issues(sym_info, label_info):
     """
     issues = []
     try:
-        if label_info.get("font_color") and not label_info.get("halo_enabled"):
+        if label_info.font_color and not label_info.halo_enabled:
             issues.append("Labels without halo - check contrast against varied backgrounds")
 
-        light_colors = ['#ffffff', '#ffff00', '#00ffff', '#ffffe0']
-        for c in sym_info.get("colors", []):
-            if c.lower() in light_colors or any(c.lower().startswith(lc[:4]) for lc in light_colors):
-                issues.append("Light symbology color detected - check contrast vs map background")
-                break
+        colors = sym_info.colors
+        if not LIGHT_SET.isdisjoint(colors) or any(c[:4] in LIGHT_PREFIXES for c in colors):
+            issues.append("Light symbology color detected - check contrast vs map background")
 
-        trans = sym_info.get("transparency")
+        trans = sym_info.transparency
         if trans:
             try:
                 tnum = float(trans)
@@ -592,7 +724,7 @@ def estimate_contrast_issues(sym_info, label_info):
                 pass
 
     except Exception as e:
-        logging.debug("estimate_contrast_issues error: {}".format(e))
+        logging.debug("estimate_contrast_issues error: %s", e)
 
     return "; ".join(issues) if issues else ""
 
@@ -606,27 +738,32 @@ def process_layer_file(layer_file_path, relative_path):
     try:
         logging.info("Processing: {}".format(layer_file_path))
         
-        # Load the layer file
-        if layer_file_path.lower().endswith('.lyrx'):
-            lyr = arcpy.mp.LayerFile(layer_file_path)
-        else:
-            # .lyr files (ArcMap format) - try to load
-            lyr = arcpy.mp.LayerFile(layer_file_path)
+        # Load the layer file (.lyrx and ArcMap .lyr both open through LayerFile)
+        lyr = arcpy.mp.LayerFile(layer_file_path)
         
-        # Process each layer in the file (there may be multiple in a group)
-        for layer in lyr.listLayers():
+        # Process each layer in the file (there may be multiple in a group).
+        # CIM definitions are fetched on background threads so the next
+        # layers' getDefinition calls overlap with analysis of the current one
+        layers = tuple(lyr.listLayers())
+        if CIM_PREFETCH_THREADS > 1 and len(layers) > 1:
+            executor = _get_cim_executor()
+            cim_futures = [executor.submit(fetch_layer_definition, layer) for layer in layers]
+        else:
+            cim_futures = [None] * len(layers)
+
+        for layer, cim_future in zip(layers, cim_futures):
             try:
                 # Skip group layers
                 try:
                     if getattr(layer, "isGroupLayer", False):
-                        logging.debug("Skipping group layer: {}".format(layer.name))
+                        logging.debug("Skipping group layer: %s", layer.name)
                         continue
                 except Exception:
                     pass
 
                 # Only process feature or raster layers
                 if not (getattr(layer, "isFeatureLayer", False) or getattr(layer, "isRasterLayer", False)):
-                    logging.debug("Skipping non-feature/non-raster layer: {}".format(layer.name))
+                    logging.debug("Skipping non-feature/non-raster layer: %s", layer.name)
                     continue
 
                 logging.info("  Analyzing layer: {}".format(layer.name))
@@ -638,14 +775,17 @@ def process_layer_file(layer_file_path, relative_path):
                 except Exception:
                     data_source = ""
 
+                # CIM definition - fetched once and shared by all analyzers
+                cim = cim_future.result() if cim_future is not None else fetch_layer_definition(layer)
+
                 # Symbology
-                sym_info = analyze_symbology(layer)
+                sym_info = analyze_symbology(layer, cim)
 
                 # Labels
-                label_info = analyze_labels(layer)
+                label_info = analyze_labels(layer, cim)
 
                 # Popups
-                popup_info = analyze_popups(layer)
+                popup_info = analyze_popups(layer, cim)
 
                 # Scale visibility
                 min_scale = ""
@@ -665,36 +805,36 @@ def process_layer_file(layer_file_path, relative_path):
                     layer.name,
                     "Feature" if getattr(layer, "isFeatureLayer", False) else "Raster" if getattr(layer, "isRasterLayer", False) else type(layer).__name__,
                     data_source,
-                    sym_info.get("symbol_type", ""),
-                    ", ".join(sym_info.get("colors", [])[:10]),
-                    "Yes" if sym_info.get("uses_multiple_colors") else "No",
-                    sym_info.get("color_notes", ""),
-                    ", ".join(sym_info.get("line_widths", [])),
-                    sym_info.get("transparency", ""),
+                    sym_info.symbol_type,
+                    ", ".join(sym_info.colors[:10]),
+                    "Yes" if sym_info.uses_multiple_colors else "No",
+                    sym_info.color_notes,
+                    ", ".join(sym_info.line_widths),
+                    sym_info.transparency,
                     contrast_issues,
-                    "Yes" if label_info.get("labels_enabled") else "No",
-                    label_info.get("font_name", ""),
-                    label_info.get("font_size", ""),
-                    "Yes" if label_info.get("font_bold") else "No",
-                    label_info.get("font_color", ""),
-                    "Yes" if label_info.get("halo_enabled") else "No",
-                    label_info.get("halo_color", ""),
-                    label_info.get("halo_size", ""),
-                    label_info.get("label_notes", ""),
-                    "Yes" if popup_info.get("popup_enabled") else ("Unknown" if popup_info.get("popup_enabled") == "" else "No"),
-                    len(popup_info.get("popup_fields", [])),
-                    ", ".join((popup_info.get("popup_fields") or [])[:10]),
+                    "Yes" if label_info.labels_enabled else "No",
+                    label_info.font_name,
+                    label_info.font_size,
+                    "Yes" if label_info.font_bold else "No",
+                    label_info.font_color,
+                    "Yes" if label_info.halo_enabled else "No",
+                    label_info.halo_color,
+                    label_info.halo_size,
+                    label_info.label_notes,
+                    "Yes" if popup_info.popup_enabled else ("Unknown" if popup_info.popup_enabled == "" else "No"),
+                    len(popup_info.popup_fields),
+                    ", ".join((popup_info.popup_fields or [])[:10]),
                     min_scale,
                     max_scale,
-                    "; ".join(filter(None, [sym_info.get("sym_notes", ""), popup_info.get("popup_notes", "")]))
+                    "; ".join(filter(None, [sym_info.sym_notes, popup_info.popup_notes]))
                 ]
 
                 rows.append(row)
                 logging.info("    Extracted: colors={}; labels={}; bold={}; halo={}".format(
-                    len(sym_info.get('colors', [])), 
-                    label_info.get('labels_enabled'),
-                    label_info.get('font_bold'),
-                    label_info.get('halo_enabled')
+                    len(sym_info.colors), 
+                    label_info.labels_enabled,
+                    label_info.font_bold,
+                    label_info.halo_enabled
                 ))
 
             except Exception as e:
@@ -709,6 +849,11 @@ def process_layer_file(layer_file_path, relative_path):
                     "Error during extraction: {}".format(e)
                 ])
 
+        # Drop prefetches for layers that were skipped
+        for cim_future in cim_futures:
+            if cim_future is not None:
+                cim_future.cancel()
+
     except Exception as e:
         logging.exception("ERROR processing layer file: {}".format(layer_file_path))
         rows.append([
@@ -721,104 +866,296 @@ def process_layer_file(layer_file_path, relative_path):
             "Error loading layer file: {}".format(e)
         ])
 
+    finally:
+        # Release arcpy's native handles now: tracebacks in buffered log
+        # records keep this frame (and its locals) alive until the log flushes
+        lyr = layers = cim_futures = None
+
     return rows
 
+# -----------------------------
+# Worker pool
+# -----------------------------
+def start_log_listener(ctx):
+    """Forward worker log records from a queue to this process's handlers"""
+    log_queue = ctx.Queue()
+    listener = logging.handlers.QueueListener(
+        log_queue, *logging.getLogger('').handlers, respect_handler_level=True
+    )
+    listener.start()
+    return log_queue, listener
+
+def _init_worker(log_queue):
+    """Pool initializer: send this worker's log records to the main process"""
+    root = logging.getLogger('')
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(logging.DEBUG)
+
+def process_layer_file_worker(task):
+    """Pool entry point: task is a (layer_file_path, relative_path) tuple; returns (task, rows)"""
+    return task, process_layer_file(*task)
+
+def iter_layer_file_rows(tasks):
+    """Yield (task, rows) for each task, fanning out across N_CPUS processes when enabled"""
+    if N_CPUS <= 1 or len(tasks) < 2:
+        for task in tasks:
+            yield task, process_layer_file(*task)
+        return
+
+    # spawn (not fork) so every worker initializes its own arcpy/license state
+    ctx = multiprocessing.get_context("spawn")
+    processes = min(N_CPUS, len(tasks))
+    logging.info("Processing with {} worker processes".format(processes))
+    # Workers log through a queue; only this process writes the log file
+    log_queue, listener = start_log_listener(ctx)
+    try:
+        with ctx.Pool(processes=processes, initializer=_init_worker, initargs=(log_queue,)) as pool:
+            # imap (not imap_unordered) keeps results in task order
+            for result in pool.imap(process_layer_file_worker, tasks, chunksize=CHUNKSIZE):
+                yield result
+            # Let workers exit normally so their queued log records are sent
+            pool.close()
+            pool.join()
+    finally:
+        listener.stop()
+        # Pool shutdown: write the workers' forwarded records out in one batch
+        flush_log()
+
+# -----------------------------
+# CSV writer thread
+# -----------------------------
+def write_csv_rows(row_q, csv_path, headers, errors):
+    """
+    Writer thread: write headers, then each list of rows taken from row_q,
+    until a None sentinel. Whatever is queued is written in one writerows()
+    call. A write failure is appended to errors, and the queue is still
+    drained so producers never block on a full queue.
+    """
+    f = None
+    writer = None
+    try:
+        f = open(csv_path, "w", newline="", encoding="utf-8", buffering=CSV_BUFFER_SIZE)
+        writer = csv.writer(f)
+        writer.writerow(headers)
+    except Exception as e:
+        errors.append(e)
+
+    done = False
+    while not done:
+        batch = [row_q.get()]
+        while True:
+            try:
+                batch.append(row_q.get_nowait())
+            except queue.Empty:
+                break
+        rows = []
+        for item in batch:
+            if item is None:
+                done = True
+                break
+            rows.extend(item)
+        if writer is not None and not errors:
+            try:
+                writer.writerows(rows)
+            except Exception as e:
+                errors.append(e)
+
+    if f is not None:
+        try:
+            f.close()
+        except Exception as e:
+            errors.append(e)
+
+# -----------------------------
+# Result cache
+# -----------------------------
+def layer_file_cache_key(layer_file_path, relative_path):
+    """(path, relative_path, mtime, size) for the file, or None if it can't be stat'ed"""
+    try:
+        st = os.stat(layer_file_path)
+    except OSError:
+        return None
+    return (layer_file_path, relative_path, st.st_mtime_ns, st.st_size)
+
+def load_audit_cache(cache_path, headers):
+    """
+    Load the {cache key: rows} dict written by a previous run. Returns {} if the
+    file is missing or unreadable, or was written for another CACHE_VERSION or
+    set of CSV headers.
+    """
+    if not os.path.isfile(cache_path):
+        return {}
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or not isinstance(data.get("entries"), list):
+            logging.warning("Ignoring cache with unexpected contents: {}".format(cache_path))
+        elif data.get("version") != CACHE_VERSION or data.get("headers") != headers:
+            logging.info("Ignoring cache from a different script version: {}".format(cache_path))
+        else:
+            return {tuple(key): rows for key, rows in data["entries"]}
+    except Exception as e:
+        logging.warning("Could not read cache {}: {}".format(cache_path, e))
+    return {}
+
+def save_audit_cache(cache_path, cache, headers):
+    """Write the cache atomically (temp file + os.replace) so a crash never leaves it half-written"""
+    tmp_path = cache_path + ".tmp"
+    data = {
+        "version": CACHE_VERSION,
+        "headers": headers,
+        "entries": [[list(key), rows] for key, rows in cache.items()],
+    }
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            # default=str: the CSV writer str()s every value anyway
+            json.dump(data, f, default=str)
+        os.replace(tmp_path, cache_path)
+        logging.info("Cache saved to: {}".format(cache_path))
+    except Exception as e:
+        logging.warning("Could not write cache {}: {}".format(cache_path, e))
+
 # -----------------------------
 # Main batch extraction
 # -----------------------------
 def extract_batch_baseline_data():
     log_path = setup_logging()
+    try:
+        logging.info("="*70)
+        logging.info("OSMP BATCH LAYER FILE AUDIT")
+        logging.info("="*70)
+        logging.info("Root directory: {}".format(LAYER_FILES_ROOT))
     
-    logging.info("="*70)
-    logging.info("OSMP BATCH LAYER FILE AUDIT")
-    logging.info("="*70)
-    logging.info("Root directory: {}".format(LAYER_FILES_ROOT))
+        if not os.path.isdir(LAYER_FILES_ROOT):
+            logging.error("ERROR: Root directory does not exist: {}".format(LAYER_FILES_ROOT))
+            print("ERROR: Root directory does not exist: {}".format(LAYER_FILES_ROOT))
+            return
     
-    if not os.path.isdir(LAYER_FILES_ROOT):
-        logging.error("ERROR: Root directory does not exist: {}".format(LAYER_FILES_ROOT))
-        print("ERROR: Root directory does not exist: {}".format(LAYER_FILES_ROOT))
-        return
+        # Find all layer files
+        logging.info("Searching for .lyr and .lyrx files...")
+        layer_files = find_layer_files(LAYER_FILES_ROOT)
+        logging.info("Found {} layer files".format(len(layer_files)))
     
-    # Find all layer files
-    logging.info("Searching for .lyr and .lyrx files...")
-    layer_files = find_layer_files(LAYER_FILES_ROOT)
-    logging.info("Found {} layer files".format(len(layer_files)))
+        if len(layer_files) == 0:
+            logging.warning("No layer files found in {}".format(LAYER_FILES_ROOT))
+            print("No layer files found!")
+            return
     
-    if len(layer_files) == 0:
-        logging.warning("No layer files found in {}".format(LAYER_FILES_ROOT))
-        print("No layer files found!")
-        return
+        # Prepare output
+        output_dir = OUTPUT_FOLDER if OUTPUT_FOLDER else get_desktop_folder()
+        csv_fname = "OSMP_Batch_Baseline_{}.csv".format(datetime.now().strftime('%Y%m%d_%H%M%S'))
+        csv_path = os.path.join(output_dir, csv_fname)
     
-    # Prepare output
-    output_dir = OUTPUT_FOLDER if OUTPUT_FOLDER else get_desktop_folder()
-    csv_fname = "OSMP_Batch_Baseline_{}.csv".format(datetime.now().strftime('%Y%m%d_%H%M%S'))
-    csv_path = os.path.join(output_dir, csv_fname)
+        headers = [
+            "Folder Path", "Layer File", "Layer Name", "Layer Type", "Data Source",
+            "Symbology Type", "Colors Used (first 10)", "Uses Multiple Colors",
+            "Color Notes", "Line Widths", "Transparency",
+            "Estimated Contrast Issues",
+            "Labels Enabled", "Font Name", "Font Size", "Font Bold", "Font Color",
+            "Halo Enabled", "Halo Color", "Halo Size", "Label Issues",
+            "Popup Enabled", "Popup Fields Count", "Popup Fields (sample)",
+            "Min Scale", "Max Scale", "Extraction Notes"
+        ]
     
-    headers = [
-        "Folder Path", "Layer File", "Layer Name", "Layer Type", "Data Source",
-        "Symbology Type", "Colors Used (first 10)", "Uses Multiple Colors",
-        "Color Notes", "Line Widths", "Transparency",
-        "Estimated Contrast Issues",
-        "Labels Enabled", "Font Name", "Font Size", "Font Bold", "Font Color",
-        "Halo Enabled", "Halo Color", "Halo Size", "Label Issues",
-        "Popup Enabled", "Popup Fields Count", "Popup Fields (sample)",
-        "Min Scale", "Max Scale", "Extraction Notes"
-    ]
+        total_rows = 0
+        processed_count = 0
+        error_count = 0
+
+        # Previous run's rows, keyed by (path, relative path, mtime, size)
+        cache_path = os.path.join(output_dir, CACHE_FILENAME)
+        cache = load_audit_cache(cache_path, headers) if USE_CACHE else {}
+        fresh_cache = {}
     
-    all_rows = []
-    processed_count = 0
-    error_count = 0
+        # Build one task per changed layer file; unchanged files reuse their cached rows.
+        # ordered holds (task, cached rows or None) for every file, in find_layer_files order
+        tasks = []
+        ordered = []
+        cached_count = 0
+        task_keys = {}
+        # find_layer_files builds every path as LAYER_FILES_ROOT + os.sep + ..., so
+        # the folder's relative path is a plain slice (no per-file relpath normalization)
+        root_len = len(LAYER_FILES_ROOT.rstrip(os.sep + (os.altsep or ""))) + 1
+        for layer_file in layer_files:
+            # Get relative path for organization
+            relative_path = os.path.dirname(layer_file)[root_len:] or "Root"
+            task = (layer_file, relative_path)
+            key = layer_file_cache_key(layer_file, relative_path) if USE_CACHE else None
+            if key is not None and key in cache:
+                ordered.append((task, cache[key]))
+                cached_count += 1
+            else:
+                ordered.append((task, None))
+                tasks.append(task)
+            task_keys[task] = key
     
-    # Process each layer file
-    for layer_file in layer_files:
-        # Get relative path for organization
-        relative_path = os.path.relpath(os.path.dirname(layer_file), LAYER_FILES_ROOT)
-        if relative_path == ".":
-            relative_path = "Root"
-        
+        if cached_count:
+            logging.info("Reusing cached results for {} unchanged layer files".format(cached_count))
+
         try:
-            rows = process_layer_file(layer_file, relative_path)
-            all_rows.extend(rows)
-            processed_count += 1
-            
-            # Check for errors in rows
-            if any("ERROR" in str(row) for row in rows):
-                error_count += 1
+            # CSV writing runs on its own thread so disk I/O overlaps with analysis
+            row_q = queue.Queue(maxsize=CSV_QUEUE_SIZE)
+            writer_errors = []
+            writer_thread = threading.Thread(
+                target=write_csv_rows, args=(row_q, csv_path, headers, writer_errors), daemon=True
+            )
+            writer_thread.start()
+        
+            # Process each layer file, handing its rows to the writer thread
+            try:
+                fresh = iter_layer_file_rows(tasks)
+                # Cached and freshly processed files interleave in layer-file order
+                results = ((task, rows) if rows is not None else next(fresh) for task, rows in ordered)
+                for task, rows in results:
+                    row_q.put(rows)
+                    total_rows += len(rows)
+                    processed_count += 1
                 
-        except Exception as e:
-            logging.exception("Failed to process: {}".format(layer_file))
-            error_count += 1
-    
-    # Write combined CSV
-    try:
-        with open(csv_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(headers)
-            writer.writerows(all_rows)
+                    # Check for errors in rows; only clean results are cached so failures get retried
+                    if any("ERROR" in str(row) for row in rows):
+                        error_count += 1
+                    elif task_keys.get(task) is not None:
+                        fresh_cache[task_keys[task]] = rows
+                    
+            except Exception as e:
+                logging.exception("Failed to process layer files")
+                error_count += len(layer_files) - processed_count
         
-        logging.info("="*70)
-        logging.info("EXTRACTION COMPLETE")
-        logging.info("="*70)
-        logging.info("Processed {} layer files".format(processed_count))
-        logging.info("Total layers extracted: {}".format(len(all_rows)))
-        logging.info("Files with errors: {}".format(error_count))
-        logging.info("CSV saved to: {}".format(csv_path))
-        logging.info("Log saved to: {}".format(log_path))
+            row_q.put(None)
+            writer_thread.join()
+            if writer_errors:
+                raise writer_errors[0]
         
-        print("\n" + "="*70)
-        print("BATCH EXTRACTION FINISHED")
-        print("="*70)
-        print("Processed layer files: {}".format(processed_count))
-        print("Total layers extracted: {}".format(len(all_rows)))
-        print("Files with errors: {}".format(error_count))
-        print("CSV: {}".format(csv_path))
-        print("Log: {}".format(log_path))
-        print("\nNote: Review the log file for any errors or warnings.")
+            # Only files seen this run are kept, so deleted/changed files drop out
+            if USE_CACHE:
+                save_audit_cache(cache_path, fresh_cache, headers)
         
-    except Exception as e:
-        logging.exception("ERROR writing CSV")
-        print("ERROR writing CSV: {}".format(e))
-        print("Log: {}".format(log_path))
+            logging.info("="*70)
+            logging.info("EXTRACTION COMPLETE")
+            logging.info("="*70)
+            logging.info("Processed {} layer files".format(processed_count))
+            logging.info("Total layers extracted: {}".format(total_rows))
+            logging.info("Files with errors: {}".format(error_count))
+            logging.info("CSV saved to: {}".format(csv_path))
+            logging.info("Log saved to: {}".format(log_path))
+        
+            print("\n" + "="*70)
+            print("BATCH EXTRACTION FINISHED")
+            print("="*70)
+            print("Processed layer files: {}".format(processed_count))
+            print("Total layers extracted: {}".format(total_rows))
+            print("Files with errors: {}".format(error_count))
+            print("CSV: {}".format(csv_path))
+            print("Log: {}".format(log_path))
+            print("\nNote: Review the log file for any errors or warnings.")
+        
+        except Exception as e:
+            logging.exception("ERROR writing CSV")
+            print("ERROR writing CSV: {}".format(e))
+            print("Log: {}".format(log_path))
+    finally:
+        # ArcGIS Pro's Python session outlives the run, so write out everything still
+        # buffered (including the summary) now rather than at interpreter exit
+        flush_log()
 
 # -----------------------------
 # Run
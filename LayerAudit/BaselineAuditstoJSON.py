@@ -1,9 +1,45 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
+import numpy as np
 import json
+import csv
 from datetime import date
+from functools import lru_cache
+from itertools import chain
 import re
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None  # Numba is optional; pair_ratios falls back to NumPy
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pacsv = None  # pyarrow is optional; CSVs are read with pandas instead
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # orjson is optional; the JSON is written with the json module instead
+
+# Normalized spellings of yes/no values in the audit CSVs
+_TRUE = frozenset({'yes', 'true', '1'})
+_FALSE = frozenset({'no', 'false', '0', ''})
+
+# Critical issue keywords, matched case-insensitively in one search per issue
+_CRITICAL_RE = re.compile(r'red/green|single color|lack halo|cannot guarantee|fails', re.I)
+
+# CSV columns read by the checks and notes
+NEEDED_COLS = (
+    'Map Name', 'Layer Name', 'Symbology Type', 'Colors Used (first 10)', 'Uses Multiple Colors',
+    'Color Notes', 'Line Widths', 'Transparency', 'Estimated Contrast Issues',
+    'Labels Enabled', 'Font Name', 'Font Size', 'Font Bold', 'Font Color',
+    'Halo Enabled', 'Halo Color', 'Halo Size', 'Label Issues',
+    'Popup Enabled', 'Popup Fields Count', 'Popup Fields (sample)'
+)
+
 # --- List of CSV files ---
 csv_files = [
     r"Y:\LayerAudit\Baseline Audits\OSMP_Baseline_Layers_20251117_082710.csv",
@@ -16,13 +52,16 @@ csv_files = [
     r"Y:\LayerAudit\Baseline Audits\OSMP_Baseline_OSMP_Trail_Map_(WAB)_20251117_090840.csv"
 ]
 
+# List every symbol color pair in contrastMeasurements (False = only the pairs failing 3:1)
+SHOW_ALL_COLOR_PAIRS = True
+
 # --- Contrast Calculation Functions ---
 
 def hex_to_rgb(hex_color):
     """Convert hex color to RGB tuple"""
     hex_color = hex_color.lstrip('#')
     if len(hex_color) == 6:
-        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+        return tuple(bytes.fromhex(hex_color))
     return None
 
 def relative_luminance(rgb):
@@ -43,36 +82,118 @@ def relative_luminance(rgb):
     # Calculate luminance
     return 0.2126 * r + 0.7152 * g + 0.0722 * b
 
-def contrast_ratio(color1_hex, color2_hex):
-    """Calculate WCAG contrast ratio between two hex colors"""
-    try:
-        rgb1 = hex_to_rgb(color1_hex)
-        rgb2 = hex_to_rgb(color2_hex)
-        
-        if not rgb1 or not rgb2:
+# Luminance per 6-digit hex code (lowercase, no '#'), shared across all rows
+luminance_cache = {}
+
+def precompute_luminance(hex_colors):
+    """Compute luminance for many hex colors in one NumPy pass and store it in luminance_cache"""
+    codes = {str(h).lstrip('#').lower() for h in hex_colors}
+    codes = sorted(c for c in codes - luminance_cache.keys() if re.fullmatch(r'[0-9a-f]{6}', c))
+    if not codes:
+        return
+    
+    # Decode every code at once into an (N, 3) array of 0-1 channel values
+    rgb = np.frombuffer(bytes.fromhex(''.join(codes)), dtype=np.uint8).reshape(-1, 3) / 255.0
+    
+    # Same gamma correction and weights as relative_luminance
+    lin = np.where(rgb <= 0.03928, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    lum = 0.2126 * lin[:, 0] + 0.7152 * lin[:, 1] + 0.0722 * lin[:, 2]
+    luminance_cache.update(zip(codes, lum.tolist()))
+
+def hex_luminance(hex_color):
+    """Relative luminance of a hex color, from luminance_cache when available"""
+    code = hex_color.lstrip('#').lower()
+    lum = luminance_cache.get(code)
+    if lum is None:
+        if not re.fullmatch(r'[0-9a-f]{6}', code):
             return None
-        
-        lum1 = relative_luminance(rgb1)
-        lum2 = relative_luminance(rgb2)
-        
-        # Ensure lighter color is in numerator
-        lighter = max(lum1, lum2)
-        darker = min(lum1, lum2)
-        
-        ratio = (lighter + 0.05) / (darker + 0.05)
-        return round(ratio, 2)
-    except:
+        rgb = hex_to_rgb(code)
+        lum = relative_luminance(rgb)
+        luminance_cache[code] = lum
+    return lum
+
+@lru_cache(maxsize=4096)
+def _pair_contrast_ratio(color1_hex, color2_hex):
+    """contrast_ratio for an already-normalized pair (memoized)"""
+    lum1 = hex_luminance(color1_hex)
+    lum2 = hex_luminance(color2_hex)
+    
+    if lum1 is None or lum2 is None:
         return None
+    
+    # Ensure lighter color is in numerator
+    lighter = max(lum1, lum2)
+    darker = min(lum1, lum2)
+    
+    ratio = (lighter + 0.05) / (darker + 0.05)
+    return round(ratio, 2)
+
+def contrast_ratio(color1_hex, color2_hex):
+    """Calculate WCAG contrast ratio between two hex colors"""
+    # The ratio is symmetric, so normalize case and order to share cache entries
+    color1_hex, color2_hex = sorted((color1_hex.lower(), color2_hex.lower()))
+    return _pair_contrast_ratio(color1_hex, color2_hex)
+
+# 6-digit hex color codes
+_HEX_RE = re.compile(r'#[0-9a-fA-F]{6}')
 
 def parse_hex_colors(color_string):
     """Extract all hex color codes from a string"""
-    if not color_string or str(color_string).lower() == 'nan':
+    color_string = str(color_string)
+    if '#' not in color_string:
         return []
     
-    # Find all hex color codes
-    hex_pattern = r'#[0-9a-fA-F]{6}'
-    colors = re.findall(hex_pattern, str(color_string))
-    return list(set(colors))  # Remove duplicates
+    # Find all hex color codes, removing duplicates but keeping first-seen order
+    return list(dict.fromkeys(_HEX_RE.findall(color_string)))
+
+def pair_ratios(lum):
+    """Contrast ratio matrix for an array of luminances (lighter over darker)"""
+    return (np.maximum.outer(lum, lum) + 0.05) / (np.minimum.outer(lum, lum) + 0.05)
+
+if njit is not None:
+    @njit(cache=True)
+    def pair_ratios(lum):
+        """Contrast ratio matrix for an array of luminances (lighter over darker)"""
+        n = lum.shape[0]
+        ratios = np.ones((n, n))
+        for i in range(n):
+            for j in range(i + 1, n):
+                lighter = max(lum[i], lum[j])
+                darker = min(lum[i], lum[j])
+                ratios[i, j] = ratios[j, i] = (lighter + 0.05) / (darker + 0.05)
+        return ratios
+    
+    # Compile up front so the first layer doesn't pay for it
+    pair_ratios(np.zeros(2))
+
+def failing_color_pairs(colors):
+    """Color pairs below 3:1 contrast, plus the minimum ratio over all pairs"""
+    if len(colors) < 2:
+        return [], 0
+    
+    lum = np.array([hex_luminance(c) for c in colors], dtype=float)
+    order = np.argsort(lum, kind='stable')
+    ranked = lum[order]
+    
+    # Contrast grows with the luminance gap, so the minimum is between neighbors in luminance order
+    min_ratio = round(float(((ranked[1:] + 0.05) / (ranked[:-1] + 0.05)).min()), 2)
+    
+    # Walk each color up the luminance order until pairs start passing
+    failing = []
+    for a in range(len(ranked)):
+        for b in range(a + 1, len(ranked)):
+            ratio = round(float((ranked[b] + 0.05) / (ranked[a] + 0.05)), 2)
+            if ratio >= 3.0:
+                break
+            i, j = sorted((order[a], order[b]))
+            failing.append((i, j, ratio))
+    
+    # Report in the same pair order as check_multi_color_contrast
+    failing.sort()
+    return [
+        {'color1': colors[i], 'color2': colors[j], 'ratio': ratio, 'passes_3_1': False, 'passes_4_5_1': False}
+        for i, j, ratio in failing
+    ], min_ratio
 
 def check_multi_color_contrast(colors):
     """Check contrast ratios between all color pairs"""
@@ -81,175 +202,191 @@ def check_multi_color_contrast(colors):
     if len(colors) < 2:
         return results
     
+    lum = np.array([hex_luminance(c) for c in colors], dtype=float)
+    
+    # Every pair at once: lighter luminance over darker
+    ratios = pair_ratios(lum)
+    
     # Check all pairs
     for i in range(len(colors)):
         for j in range(i + 1, len(colors)):
-            ratio = contrast_ratio(colors[i], colors[j])
-            if ratio is not None:
-                results.append({
-                    'color1': colors[i],
-                    'color2': colors[j],
-                    'ratio': ratio,
-                    'passes_3_1': ratio >= 3.0,
-                    'passes_4_5_1': ratio >= 4.5
-                })
+            ratio = round(float(ratios[i, j]), 2)
+            results.append({
+                'color1': colors[i],
+                'color2': colors[j],
+                'ratio': ratio,
+                'passes_3_1': ratio >= 3.0,
+                'passes_4_5_1': ratio >= 4.5
+            })
     
     return results
 
+# --- Column helpers ---
+
+def text_column(frame, col):
+    """Stripped str() of every value in a column ('' on every row if the column is missing)"""
+    if col not in frame.columns:
+        return pd.Series('', index=frame.index, dtype=object)
+    return frame[col].astype(object).map(str).str.strip()
+
+def norm_column(frame, col):
+    """Lowercased text of a normalized column, for comparing against _TRUE/_FALSE"""
+    return frame[col].str.lower()
+
+def clean_column(frame, col):
+    """Clean text values from a normalized column (blank out nan/none)"""
+    text = frame[col]
+    return text.mask(text.str.lower().isin(['nan', 'none', '']), '')
+
+def note_column(mask, note):
+    """The note string on rows where mask is True, '' elsewhere"""
+    return pd.Series(note, index=mask.index, dtype=object).where(mask, '')
+
+def combine_notes(*columns):
+    """Per-row list of non-empty notes, in column order (a column may hold lists of notes)"""
+    rows = []
+    for notes in zip(*columns):
+        issues = []
+        for note in notes:
+            if isinstance(note, list):
+                issues.extend(note)
+            elif note:
+                issues.append(note)
+        rows.append(issues)
+    return rows
+
 # --- Helper functions for intelligent issue detection ---
 
-def detect_color_issues(row):
-    """Detect specific color accessibility issues"""
-    issues = []
+def multi_color_notes(hex_colors, failing_pairs, min_ratio):
+    """Notes for a layer declaring multiple symbol colors"""
+    if len(hex_colors) < 2:
+        return ["Multiple colors declared but hex codes not detected - verify distinguishability"]
+    
+    # Check if any pairs fail 3:1
+    if failing_pairs:
+        return [
+            "Colors {0} and {1} have {2}:1 contrast (FAILS 3:1 minimum for graphics)".format(
+                pair['color1'], pair['color2'], pair['ratio']
+            )
+            for pair in failing_pairs
+        ]
     
+    # All pairs pass, but still note it
+    return ["Multiple colors with minimum {0}:1 contrast (meets 3:1 for graphics)".format(min_ratio)]
+
+def detect_color_issues(frame):
+    """Detect specific color accessibility issues"""
     # Check for red/green combinations (colorblind issue)
-    colors = str(row.get('Colors Used (first 10)', '')).lower()
-    color_notes = str(row.get('Color Notes', '')).lower()
+    colors = frame['_colors'].str.lower()
+    color_notes = frame['Color Notes'].str.lower()
     
-    if ('red' in color_notes or '#ff' in colors or '#e6' in colors) and \
-       ('green' in color_notes or '#00ff' in colors or '#38a8' in colors):
-        issues.append("Red/green color combination detected - colorblind accessibility issue")
+    red = color_notes.str.contains('red', regex=False) | colors.str.contains('#ff', regex=False) | \
+        colors.str.contains('#e6', regex=False)
+    green = color_notes.str.contains('green', regex=False) | colors.str.contains('#00ff', regex=False) | \
+        colors.str.contains('#38a8', regex=False)
+    red_green = note_column(red & green, "Red/green color combination detected - colorblind accessibility issue")
     
     # Check for light colors that may have contrast issues
     light_colors = ['#ffffff', '#ffff', '#ffffe0', '#f0f0f0']
-    if any(lc in colors for lc in light_colors):
-        issues.append("Light colors detected - verify contrast against background")
+    light = note_column(colors.str.contains('|'.join(light_colors)),
+                        "Light colors detected - verify contrast against background")
     
     # CRITICAL: Check if single color (cannot guarantee 3:1 contrast)
-    uses_multiple = str(row.get('Uses Multiple Colors', '')).strip().lower()
-    if uses_multiple in ['no', 'false', '0', '']:
-        issues.append("Single color symbology - CANNOT GUARANTEE 3:1 contrast ratio (manual verification required)")
+    single = note_column(frame['_single'],
+                         "Single color symbology - CANNOT GUARANTEE 3:1 contrast ratio (manual verification required)")
     
     # If multiple colors, check their contrast against each other
-    if uses_multiple in ['yes', 'true', '1']:
-        hex_colors = parse_hex_colors(row.get('Colors Used (first 10)', ''))
-        if len(hex_colors) >= 2:
-            contrast_results = check_multi_color_contrast(hex_colors)
-            
-            # Check if any pairs fail 3:1
-            failing_pairs = [r for r in contrast_results if not r['passes_3_1']]
-            if failing_pairs:
-                for pair in failing_pairs:
-                    issues.append(
-                        "Colors {0} and {1} have {2}:1 contrast (FAILS 3:1 minimum for graphics)".format(
-                            pair['color1'], pair['color2'], pair['ratio']
-                        )
-                    )
-            else:
-                # All pairs pass, but still note it
-                min_ratio = min([r['ratio'] for r in contrast_results]) if contrast_results else 0
-                issues.append("Multiple colors with minimum {0}:1 contrast (meets 3:1 for graphics)".format(min_ratio))
-        else:
-            issues.append("Multiple colors declared but hex codes not detected - verify distinguishability")
+    multi = [
+        multi_color_notes(hex_colors, failing, min_ratio) if uses_multiple else []
+        for uses_multiple, hex_colors, (failing, min_ratio) in zip(frame['_multi'], frame['_hex'], frame['_failing'])
+    ]
     
-    return issues
+    return combine_notes(red_green, light, single, multi)
 
-def detect_contrast_issues(row):
+def detect_contrast_issues(frame):
     """Detect potential contrast problems"""
-    issues = []
-    contrast_text = str(row.get('Estimated Contrast Issues', '')).strip()
-    
-    if contrast_text and contrast_text.lower() not in ['nan', 'none', '']:
-        issues.append(contrast_text)
+    contrast_text = frame['Estimated Contrast Issues']
+    estimated = contrast_text.where(~contrast_text.str.lower().isin(['nan', 'none', '']), '')
     
     # Check transparency
-    transparency = str(row.get('Transparency', '')).strip()
-    if transparency and transparency not in ['', 'nan', '0', '100']:
-        try:
-            trans_val = float(transparency)
-            if 0 < trans_val < 100:
-                issues.append("Transparency set to {0}% - reduces contrast, must verify against background".format(trans_val))
-        except:
-            pass
+    transparency = frame['Transparency']
+    trans_val = pd.to_numeric(transparency.where(~transparency.isin(['', 'nan', '0', '100'])),
+                              errors='coerce').astype(float)
+    translucent = note_column(
+        (trans_val > 0) & (trans_val < 100),
+        "Transparency set to " + trans_val.map('{0}'.format) + "% - reduces contrast, must verify against background"
+    )
     
     # Check if we can calculate contrast between multiple colors
-    uses_multiple = str(row.get('Uses Multiple Colors', '')).strip().lower()
-    hex_colors = parse_hex_colors(row.get('Colors Used (first 10)', ''))
-    
-    if uses_multiple in ['yes', 'true', '1'] and len(hex_colors) >= 2:
-        contrast_results = check_multi_color_contrast(hex_colors)
-        
-        if contrast_results:
-            issues.append("Multi-color contrast measured between symbols - still verify against map background")
-    else:
-        # Single color - always requires manual verification
-        issues.append("Manual contrast measurement required against map background (WCAG 2.1 AA: 3:1 for graphics, 4.5:1 for text)")
+    measured = note_column(
+        frame['_multi'] & (frame['_hex'].str.len() >= 2),
+        "Multi-color contrast measured between symbols - still verify against map background"
+    )
+    # Single color - always requires manual verification
+    manual = measured.mask(measured == '', "Manual contrast measurement required against map background (WCAG 2.1 AA: 3:1 for graphics, 4.5:1 for text)")
     
-    return issues
+    return combine_notes(estimated, translucent, manual)
 
-def detect_label_issues(row):
+def label_halo_note(ratio):
+    """Note describing label/halo contrast"""
+    if ratio is None:
+        return ''
+    if ratio < 4.5:
+        return "Label/halo contrast {0}:1 FAILS 4.5:1 minimum for text".format(ratio)
+    return "Label/halo contrast {0}:1 meets 4.5:1 for text".format(ratio)
+
+def detect_label_issues(frame):
     """Detect label accessibility issues"""
-    issues = []
-    
-    # Check if labels are enabled
-    labels_enabled = str(row.get('Labels Enabled', '')).strip().lower()
-    if labels_enabled not in ['yes', 'true', '1']:
-        return []  # No labels, no label issues
-    
-    # Check halo
-    halo_enabled = str(row.get('Halo Enabled', '')).strip().lower()
-    if halo_enabled not in ['yes', 'true', '1']:
-        issues.append("Labels lack halo - CRITICAL for contrast over varied backgrounds")
-    else:
-        # If halo exists, check contrast between label and halo
-        font_color = str(row.get('Font Color', '')).strip()
-        halo_color = str(row.get('Halo Color', '')).strip()
-        
-        if font_color and halo_color:
-            ratio = contrast_ratio(font_color, halo_color)
-            if ratio is not None:
-                if ratio < 4.5:
-                    issues.append("Label/halo contrast {0}:1 FAILS 4.5:1 minimum for text".format(ratio))
-                else:
-                    issues.append("Label/halo contrast {0}:1 meets 4.5:1 for text".format(ratio))
+    # Rows without labels have no label issues
+    labels_enabled = frame['_labels']
+    
+    # Check halo; if halo exists, check contrast between label and halo
+    no_halo = note_column(labels_enabled & ~frame['_halo'],
+                          "Labels lack halo - CRITICAL for contrast over varied backgrounds")
+    halo_contrast = [
+        label_halo_note(ratio) if halo else ''
+        for halo, ratio in zip(frame['_halo'], frame['_label_ratio'])
+    ]
     
     # Check font size
-    font_size = str(row.get('Font Size', '')).strip()
-    if font_size and font_size not in ['', 'nan']:
-        try:
-            size = float(font_size)
-            if size < 10:
-                issues.append("Font size {0}pt is below 10pt minimum recommendation".format(size))
-            elif size < 12:
-                issues.append("Font size {0}pt is below 12pt recommended for better readability".format(size))
-        except:
-            pass
+    font_size = frame['Font Size']
+    size = pd.to_numeric(font_size.where(~font_size.isin(['', 'nan'])), errors='coerce').astype(float)
+    size_text = size.map('{0}'.format)
+    small = note_column(labels_enabled & (size < 10),
+                        "Font size " + size_text + "pt is below 10pt minimum recommendation")
+    smallish = note_column(labels_enabled & (size >= 10) & (size < 12),
+                           "Font size " + size_text + "pt is below 12pt recommended for better readability")
     
     # Check label issues column
-    label_issue_text = str(row.get('Label Issues', '')).strip()
-    if label_issue_text and label_issue_text.lower() not in ['', 'nan', 'false', 'no']:
-        issues.append(label_issue_text)
+    label_issue_text = frame['Label Issues']
+    listed = label_issue_text.where(
+        labels_enabled & ~label_issue_text.str.lower().isin(['', 'nan', 'false', 'no']), ''
+    )
     
-    return issues
+    return combine_notes(no_halo, halo_contrast, small, smallish, listed)
 
-def detect_popup_issues(row):
+def detect_popup_issues(frame):
     """Detect popup accessibility issues"""
-    issues = []
-    
-    popup_enabled = str(row.get('Popup Enabled', '')).strip().lower()
-    if popup_enabled in ['yes', 'true', '1']:
-        # Check if popup fields exist
-        popup_fields = str(row.get('Popup Fields (sample)', '')).strip()
-        if not popup_fields or popup_fields == 'nan':
-            issues.append("Popup enabled but no fields detected")
-        
-        # Flag for manual HTML review
-        issues.append("Review popup HTML for: alt text on images, color contrast, semantic structure")
-    elif popup_enabled in ['unknown', '']:
-        issues.append("Popup configuration unknown - manual verification required")
-    
-    return issues
-
-def generate_contrast_measurements(row):
+    popup_enabled = frame['_popup'].isin(_TRUE)
+    
+    # Check if popup fields exist
+    popup_fields = frame['Popup Fields (sample)']
+    no_fields = note_column(popup_enabled & popup_fields.isin(['', 'nan']), "Popup enabled but no fields detected")
+    
+    # Flag for manual HTML review
+    review = note_column(popup_enabled,
+                         "Review popup HTML for: alt text on images, color contrast, semantic structure")
+    unknown = note_column(frame['_popup'].isin(['unknown', '']),
+                          "Popup configuration unknown - manual verification required")
+    
+    return combine_notes(no_fields, review, unknown)
+
+def generate_contrast_measurements(contrast_results, label_ratio):
     """Generate detailed contrast measurements for the audit"""
     measurements = []
     
-    uses_multiple = str(row.get('Uses Multiple Colors', '')).strip().lower()
-    hex_colors = parse_hex_colors(row.get('Colors Used (first 10)', ''))
-    
     # Symbol color contrasts
-    if uses_multiple in ['yes', 'true', '1'] and len(hex_colors) >= 2:
-        contrast_results = check_multi_color_contrast(hex_colors)
+    if contrast_results:
         measurements.append("=== SYMBOL COLORS ===")
         for result in contrast_results:
             status = "PASS" if result['passes_3_1'] else "FAIL"
@@ -260,58 +397,57 @@ def generate_contrast_measurements(row):
             )
     
     # Label/halo contrast
-    labels_enabled = str(row.get('Labels Enabled', '')).strip().lower()
-    if labels_enabled in ['yes', 'true', '1']:
-        font_color = str(row.get('Font Color', '')).strip()
-        halo_color = str(row.get('Halo Color', '')).strip()
-        
-        if font_color and halo_color:
-            ratio = contrast_ratio(font_color, halo_color)
-            if ratio is not None:
-                status = "PASS" if ratio >= 4.5 else "FAIL"
-                measurements.append("=== LABEL CONTRAST ===")
-                measurements.append("Text vs Halo: {0}:1 [{1} 4.5:1]".format(ratio, status))
+    if label_ratio is not None:
+        status = "PASS" if label_ratio >= 4.5 else "FAIL"
+        measurements.append("=== LABEL CONTRAST ===")
+        measurements.append("Text vs Halo: {0}:1 [{1} 4.5:1]".format(label_ratio, status))
     
     return "\n".join(measurements) if measurements else ""
 
-def determine_initial_status(color_issues, contrast_issues, label_issues, popup_issues):
-    """Intelligently determine initial audit status"""
-    # Check for critical issues
-    critical_keywords = [
-        'red/green', 'single color', 'lack halo', 'cannot guarantee',
-        'fails 3:1', 'fails 4.5:1', 'fail 3:1', 'fail 4.5:1'
-    ]
-    has_critical = any(
-        any(keyword in str(issue).lower() for keyword in critical_keywords)
-        for issue in (color_issues + contrast_issues + label_issues + popup_issues)
-    )
-    
-    # Check for passing contrast ratios
-    passing_keywords = ['meets 3:1', 'meets 4.5:1', 'pass 3:1', 'pass 4.5:1']
-    has_passing = any(
-        any(keyword in str(issue).lower() for keyword in passing_keywords)
-        for issue in (color_issues + contrast_issues + label_issues)
-    )
-    
-    if has_critical:
-        return "needs-work"
-    elif has_passing and not has_critical:
-        return "needs-work"
-    else:
-        return "needs-work"
+# --- Load and combine CSVs ---
 
-def clean_text(text):
-    """Clean text values from CSV"""
-    text = str(text).strip()
-    if text.lower() in ['nan', 'none', '']:
-        return ''
-    return text
+def read_audit_csv_pandas(path):
+    """Read one audit CSV with pandas: rows with too many fields are skipped, short rows padded"""
+    return pd.read_csv(path, quotechar='"', on_bad_lines='skip', encoding='utf-8', dtype=str, engine='c')
+
+def read_audit_csv(path):
+    """Read one audit CSV into a DataFrame, skipping malformed lines"""
+    if pacsv is None:
+        return read_audit_csv_pandas(path)
+    
+    # Every column is read as text like dtype=str above, so name them all from the header
+    with open(path, newline='', encoding='utf-8') as f:
+        columns = next(csv.reader(f), [])
+    
+    # pyarrow can only skip invalid rows, while pandas pads short ones; note any short row
+    # so the file can be re-read with pandas and both readers give the same rows
+    short_rows = []
+    def handle_invalid_row(row):
+        if row.actual_columns < row.expected_columns:
+            short_rows.append(row.number)
+        return 'skip'
+    
+    # Multithreaded block parsing. Quoted cells may span lines (e.g. multi-line error
+    # messages in Extraction Notes), as pandas allows. Blank cells are read as '' rather
+    # than null: a null becomes the text 'None' downstream, while '' is treated like pandas' NaN
+    table = pacsv.read_csv(
+        path,
+        read_options=pacsv.ReadOptions(use_threads=True, block_size=8 << 20),
+        parse_options=pacsv.ParseOptions(quote_char='"', newlines_in_values=True,
+                                         invalid_row_handler=handle_invalid_row),
+        convert_options=pacsv.ConvertOptions(
+            column_types={name: pa.string() for name in columns},
+            strings_can_be_null=False
+        )
+    )
+    if short_rows:
+        return read_audit_csv_pandas(path)
+    return table.to_pandas()
 
-# --- Load and combine CSVs ---
 dfs = []
 for f in csv_files:
     try:
-        df_temp = pd.read_csv(f, quotechar='"', on_bad_lines='skip', encoding='utf-8')
+        df_temp = read_audit_csv(f)
         dfs.append(df_temp)
         print("Loaded: {0} ({1} rows)".format(f, len(df_temp)))
     except Exception as e:
@@ -320,49 +456,101 @@ for f in csv_files:
 df = pd.concat(dfs, ignore_index=True)
 print("\nTotal combined rows: {0}".format(len(df)))
 
+# --- Precompute luminance for every distinct color in one vectorized pass ---
+all_hex_colors = set()
+for col in ['Colors Used (first 10)', 'Font Color', 'Halo Color']:
+    if col in df.columns:
+        all_hex_colors.update(df[col].dropna().astype(str).str.findall(_HEX_RE).explode().dropna())
+precompute_luminance(all_hex_colors)
+
+# --- Normalize the columns the checks share, once for the whole table ---
+df = pd.DataFrame({col: text_column(df, col) for col in NEEDED_COLS}, index=df.index)
+
+df['_map'] = clean_column(df, "Map Name")
+df['_layer'] = clean_column(df, "Layer Name")
+df = df[(df['_map'] != '') & (df['_layer'] != '')].copy()
+
+df['_colors'] = df['Colors Used (first 10)']
+df['_um'] = norm_column(df, 'Uses Multiple Colors')
+df['_single'] = df['_um'].isin(_FALSE)
+df['_multi'] = df['_um'].isin(_TRUE)
+df['_labels'] = norm_column(df, 'Labels Enabled').isin(_TRUE)
+df['_halo'] = norm_column(df, 'Halo Enabled').isin(_TRUE)
+df['_popup'] = norm_column(df, 'Popup Enabled')
+df['_font_color'] = df['Font Color']
+df['_halo_color'] = df['Halo Color']
+
+# Hex-pair contrast stays per row; each row's pairs are computed once and shared
+df['_hex'] = [parse_hex_colors(c) for c in df['_colors']]
+df['_failing'] = [
+    failing_color_pairs(hex_colors) if uses_multiple else ([], 0)
+    for uses_multiple, hex_colors in zip(df['_multi'], df['_hex'])
+]
+if SHOW_ALL_COLOR_PAIRS:
+    df['_pairs'] = [
+        check_multi_color_contrast(hex_colors) if uses_multiple and len(hex_colors) >= 2 else []
+        for uses_multiple, hex_colors in zip(df['_multi'], df['_hex'])
+    ]
+else:
+    df['_pairs'] = [failing for failing, _ in df['_failing']]
+# object dtype keeps missing ratios as None; a float column would turn them into NaN
+df['_label_ratio'] = pd.Series([
+    contrast_ratio(font_color, halo_color) if labels and font_color and halo_color else None
+    for labels, font_color, halo_color in zip(df['_labels'], df['_font_color'], df['_halo_color'])
+], index=df.index, dtype=object)
+
+audit = pd.DataFrame({
+    'key': df['_map'] + "|||" + df['_layer'],
+    'color_issues': detect_color_issues(df),
+    'contrast_issues': detect_contrast_issues(df),
+    'label_issues': detect_label_issues(df),
+    'popup_issues': detect_popup_issues(df),
+    'measurements': [generate_contrast_measurements(p, r) for p, r in zip(df['_pairs'], df['_label_ratio'])],
+    'single_color': df['_single'],
+    'symbology_type': clean_column(df, 'Symbology Type'),
+    'colors': clean_column(df, 'Colors Used (first 10)'),
+    'uses_multiple': clean_column(df, 'Uses Multiple Colors'),
+    'line_widths': clean_column(df, 'Line Widths'),
+    'transparency': clean_column(df, 'Transparency'),
+    'original_notes': clean_column(df, 'Color Notes'),
+    'labels_shown': clean_column(df, 'Labels Enabled').isin(['Yes', 'yes', 'True', 'true', '1']),
+    'font_name': clean_column(df, 'Font Name'),
+    'font_size': clean_column(df, 'Font Size'),
+    'bold': norm_column(df, 'Font Bold').isin(_TRUE),
+    'font_color': clean_column(df, 'Font Color'),
+    'halo': df['_halo'],
+    'halo_color': clean_column(df, 'Halo Color'),
+    'halo_size': clean_column(df, 'Halo Size'),
+    'popup_enabled': df['_popup'].isin(_TRUE),
+    'popup_fields_count': clean_column(df, 'Popup Fields Count'),
+    'popup_fields': clean_column(df, 'Popup Fields (sample)'),
+}, index=df.index)
+
 # --- Prepare JSON structure with intelligent analysis ---
 baseline_data = {}
 today = date.today().isoformat()
 
-stats = {
-    'total': 0,
-    'pass': 0,
-    'needs_work': 0,
-    'with_color_issues': 0,
-    'with_contrast_issues': 0,
-    'with_label_issues': 0,
-    'with_popup_issues': 0,
-    'single_color_layers': 0,
-    'critical_issues': 0,
-    'contrast_calculated': 0,
-    'contrast_passes': 0,
-    'contrast_fails': 0
-}
+total = needs_work = 0
+with_color_issues = with_contrast_issues = with_label_issues = with_popup_issues = 0
+single_color_layers = critical_issues = 0
+contrast_calculated = contrast_passes = contrast_fails = 0
 
-for _, row in df.iterrows():
-    map_name = clean_text(row.get("Map Name", ""))
-    layer_name = clean_text(row.get("Layer Name", ""))
-    
-    if not map_name or not layer_name:
-        continue
-    
-    key = "{0}|||{1}".format(map_name, layer_name)
-    stats['total'] += 1
-    
-    # Detect issues intelligently
-    color_issue_list = detect_color_issues(row)
-    contrast_issue_list = detect_contrast_issues(row)
-    label_issue_list = detect_label_issues(row)
-    popup_issue_list = detect_popup_issues(row)
-    
-    # Generate contrast measurements
-    contrast_measurements = generate_contrast_measurements(row)
+for row in audit.itertuples(index=False):
+    key = row.key
+    total += 1
+    
+    # Issues detected column-wise above
+    color_issue_list = row.color_issues
+    contrast_issue_list = row.contrast_issues
+    label_issue_list = row.label_issues
+    popup_issue_list = row.popup_issues
+    
+    # Contrast measurements
+    contrast_measurements = row.measurements
     if contrast_measurements:
-        stats['contrast_calculated'] += 1
-        if 'PASS' in contrast_measurements:
-            stats['contrast_passes'] += 1
-        if 'FAIL' in contrast_measurements:
-            stats['contrast_fails'] += 1
+        contrast_calculated += 1
+        contrast_passes += 'PASS' in contrast_measurements
+        contrast_fails += 'FAIL' in contrast_measurements
     
     has_color_issues = len(color_issue_list) > 0
     has_contrast_issues = len(contrast_issue_list) > 0
@@ -370,100 +558,52 @@ for _, row in df.iterrows():
     has_popup_issues = len(popup_issue_list) > 0
     
     # Track specific critical issues
-    uses_multiple = str(row.get('Uses Multiple Colors', '')).strip().lower()
-    if uses_multiple in ['no', 'false', '0', '']:
-        stats['single_color_layers'] += 1
-    
-    critical_keywords = ['red/green', 'single color', 'lack halo', 'cannot guarantee', 'fails']
-    if any(
-        any(keyword in str(issue).lower() for keyword in critical_keywords)
-        for issue in (color_issue_list + contrast_issue_list + label_issue_list)
-    ):
-        stats['critical_issues'] += 1
+    single_color_layers += row.single_color
+    critical_issues += any(
+        _CRITICAL_RE.search(issue)
+        for issue in chain(color_issue_list, contrast_issue_list, label_issue_list)
+    )
     
     # Update stats
-    if has_color_issues: stats['with_color_issues'] += 1
-    if has_contrast_issues: stats['with_contrast_issues'] += 1
-    if has_label_issues: stats['with_label_issues'] += 1
-    if has_popup_issues: stats['with_popup_issues'] += 1
-    
-    # Determine initial status
-    initial_status = determine_initial_status(
-        color_issue_list, contrast_issue_list, 
-        label_issue_list, popup_issue_list
-    )
+    with_color_issues += has_color_issues
+    with_contrast_issues += has_contrast_issues
+    with_label_issues += has_label_issues
+    with_popup_issues += has_popup_issues
     
-    if initial_status == 'pass': stats['pass'] += 1
-    else: stats['needs_work'] += 1
+    # Every layer starts as needs-work until a human reviews it
+    needs_work += 1
     
     # Build comprehensive color notes
-    color_notes_parts = []
-    color_notes_parts.append("Symbology Type: {0}".format(clean_text(row.get('Symbology Type', ''))))
-    color_notes_parts.append("Colors: {0}".format(clean_text(row.get('Colors Used (first 10)', ''))))
-    color_notes_parts.append("Multiple Colors: {0}".format(clean_text(row.get('Uses Multiple Colors', ''))))
-    
-    line_widths = clean_text(row.get('Line Widths', ''))
-    if line_widths:
-        color_notes_parts.append("Line Widths: {0}".format(line_widths))
-    
-    transparency = clean_text(row.get('Transparency', ''))
-    if transparency:
-        color_notes_parts.append("Transparency: {0}".format(transparency))
-    
-    original_notes = clean_text(row.get('Color Notes', ''))
-    if original_notes:
-        color_notes_parts.append("Notes: {0}".format(original_notes))
-    
-    if color_issue_list:
-        color_notes_parts.append("ISSUES: {0}".format('; '.join(color_issue_list)))
+    color_notes = (
+        f"Symbology Type: {row.symbology_type} | Colors: {row.colors} | Multiple Colors: {row.uses_multiple}"
+        + (f" | Line Widths: {row.line_widths}" if row.line_widths else "")
+        + (f" | Transparency: {row.transparency}" if row.transparency else "")
+        + (f" | Notes: {row.original_notes}" if row.original_notes else "")
+        + (f" | ISSUES: {'; '.join(color_issue_list)}" if color_issue_list else "")
+    )
     
     # Build comprehensive label notes
-    label_notes_parts = []
-    labels_enabled = clean_text(row.get('Labels Enabled', ''))
-    
-    if labels_enabled in ['Yes', 'yes', 'True', 'true', '1']:
-        label_notes_parts.append("Labels: ENABLED")
-        label_notes_parts.append("Font: {0} {1}pt".format(
-            clean_text(row.get('Font Name', '')), 
-            clean_text(row.get('Font Size', ''))
-        ))
-        
-        if clean_text(row.get('Font Bold', '')).lower() in ['yes', 'true', '1']:
-            label_notes_parts.append("Bold: Yes")
-        
-        font_color = clean_text(row.get('Font Color', ''))
-        if font_color:
-            label_notes_parts.append("Color: {0}".format(font_color))
-        
-        halo = clean_text(row.get('Halo Enabled', ''))
-        if halo.lower() in ['yes', 'true', '1']:
-            halo_color = clean_text(row.get('Halo Color', ''))
-            halo_size = clean_text(row.get('Halo Size', ''))
-            label_notes_parts.append("Halo: {0} ({1})".format(halo_color, halo_size))
-        else:
-            label_notes_parts.append("Halo: NONE")
-        
-        if label_issue_list:
-            label_notes_parts.append("ISSUES: {0}".format('; '.join(label_issue_list)))
+    if row.labels_shown:
+        label_notes = (
+            f"Labels: ENABLED | Font: {row.font_name} {row.font_size}pt"
+            + (" | Bold: Yes" if row.bold else "")
+            + (f" | Color: {row.font_color}" if row.font_color else "")
+            + (f" | Halo: {row.halo_color} ({row.halo_size})" if row.halo else " | Halo: NONE")
+            + (f" | ISSUES: {'; '.join(label_issue_list)}" if label_issue_list else "")
+        )
     else:
-        label_notes_parts.append("Labels: DISABLED")
+        label_notes = "Labels: DISABLED"
     
     # Build contrast notes from detected issues
     contrast_notes = " | ".join(contrast_issue_list) if contrast_issue_list else ""
     
     # Build popup notes
-    popup_notes_parts = []
-    popup_enabled = clean_text(row.get('Popup Enabled', ''))
-    popup_fields_count = clean_text(row.get('Popup Fields Count', ''))
-    
-    if popup_enabled.lower() in ['yes', 'true', '1']:
-        popup_notes_parts.append("Enabled with {0} fields".format(popup_fields_count))
-        popup_notes_parts.append("Fields: {0}".format(clean_text(row.get('Popup Fields (sample)', ''))))
+    if row.popup_enabled:
+        popup_notes = f"Enabled with {row.popup_fields_count} fields | Fields: {row.popup_fields}"
     else:
-        popup_notes_parts.append("Popup: Unknown/Not configured")
-    
+        popup_notes = "Popup: Unknown/Not configured"
     if popup_issue_list:
-        popup_notes_parts.append("ISSUES: {0}".format('; '.join(popup_issue_list)))
+        popup_notes += f" | ISSUES: {'; '.join(popup_issue_list)}"
     
     # Build comprehensive issues summary
     issues_summary_parts = []
@@ -477,20 +617,20 @@ for _, row in df.iterrows():
         issues_summary_parts.append("POPUPS: {0}".format('; '.join(popup_issue_list)))
     
     baseline_data[key] = {
-        "status": initial_status,
+        "status": "needs-work",
         "auditDate": today,
         "auditor": "Tess Boada (Automated)",
         "colorIssues": has_color_issues,
-        "colorNotes": " | ".join(color_notes_parts),
+        "colorNotes": color_notes,
         "contrastIssues": has_contrast_issues,
         "contrastMeasurements": contrast_measurements,
         "contrastNotes": contrast_notes,
         "symbolIssues": False,
         "symbolNotes": "",
         "labelIssues": has_label_issues,
-        "labelNotes": " | ".join(label_notes_parts),
+        "labelNotes": label_notes,
         "popupIssues": has_popup_issues,
-        "popupNotes": " | ".join(popup_notes_parts),
+        "popupNotes": popup_notes,
         "popupHeaderBg": "",
         "popupHeaderText": "",
         "popupRestrictedBg": "",
@@ -498,10 +638,28 @@ for _, row in df.iterrows():
         "issuesSummary": " || ".join(issues_summary_parts)
     }
 
+stats = {
+    'total': total,
+    'needs_work': needs_work,
+    'with_color_issues': with_color_issues,
+    'with_contrast_issues': with_contrast_issues,
+    'with_label_issues': with_label_issues,
+    'with_popup_issues': with_popup_issues,
+    'single_color_layers': single_color_layers,
+    'critical_issues': critical_issues,
+    'contrast_calculated': contrast_calculated,
+    'contrast_passes': contrast_passes,
+    'contrast_fails': contrast_fails
+}
+
 # --- Save to JSON ---
 output_file = r"Y:\LayerAudit\Baseline_Audit_OSMP_All_Layers.json"
-with open(output_file, "w", encoding="utf-8") as f:
-    json.dump(baseline_data, f, indent=2)
+if orjson is not None:
+    with open(output_file, "wb") as f:
+        f.write(orjson.dumps(baseline_data, option=orjson.OPT_INDENT_2))
+else:
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(baseline_data, f, indent=2)
 
 # --- Print summary report ---
 print("\nJSON file generated: {0}".format(output_file))
@@ -509,7 +667,6 @@ print("\n" + "="*70)
 print("AUDIT BASELINE SUMMARY WITH AUTOMATED CONTRAST CHECKING")
 print("="*70)
 print("Total Layers:                    {0}".format(stats['total']))
-print("Pass (No Issues):                {0} ({1:.1f}%)".format(stats['pass'], stats['pass']/stats['total']*100))
 print("Needs Work:                      {0} ({1:.1f}%)".format(stats['needs_work'], stats['needs_work']/stats['total']*100))
 print("\nAutomated Contrast Analysis:")
 print("  Layers with calculated contrast: {0}".format(stats['contrast_calculated']))
@@ -9,6 +9,10 @@ import arcpy
 import csv
 import os
 import logging
+import logging.handlers
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 
 # -----------------------------
@@ -16,6 +20,16 @@ from datetime import datetime
 # -----------------------------
 LAYER_FILES_ROOT = r"E:\Layers"
 OUTPUT_FOLDER = None  # None = use desktop, or specify a path like r"Y:\LayerAudit\Batch_Results"
+CSV_BUFFER_SIZE = 256 * 1024  # bytes buffered before each write to the output CSV
+# Worker processes for layer files (1 = process files in this process). Opt-in: spawned
+# workers relaunch sys.executable, which under ArcGIS Pro is ArcGISPro.exe unless
+# multiprocessing.set_executable() points at python.exe, and each one imports arcpy and
+# checks out its own license
+N_WORKERS = 1
+CHUNKSIZE = 8  # layer files sent to a worker at a time
+
+# Yes/No cell values, indexed by bool
+_YN = ("No", "Yes")
 
 # -----------------------------
 # Helpers: paths & logging
@@ -52,6 +66,21 @@ def setup_logging():
     logging.info("Log started: {}".format(log_path))
     return log_path
 
+def start_log_listener():
+    """Forward worker log records from a queue to this process's handlers"""
+    log_queue = multiprocessing.get_context("spawn").Queue()
+    listener = logging.handlers.QueueListener(
+        log_queue, *logging.getLogger('').handlers, respect_handler_level=True
+    )
+    listener.start()
+    return log_queue, listener
+
+def _init_worker(log_queue):
+    """Send this worker's log records to the main process"""
+    root = logging.getLogger('')
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(logging.DEBUG)
+
 def find_layer_files(root_dir):
     """Recursively find all .lyr and .lyrx files"""
     layer_files = []
@@ -426,9 +455,10 @@ def estimate_contrast_issues(sym_info, label_info):
 # -----------------------------
 # Process a single layer file
 # -----------------------------
-def process_layer_file(layer_file_path, relative_path):
-    """Process a single .lyr or .lyrx file and return row data"""
+def process_layer_file(layer_file_path, relative_path, file_name):
+    """Process a single .lyr or .lyrx file and return (row data, whether any error occurred)"""
     rows = []
+    had_error = False
     
     try:
         logging.info("Processing: {}".format(layer_file_path))
@@ -473,6 +503,7 @@ def process_layer_file(layer_file_path, relative_path):
 
                 # Popups
                 popup_info = analyze_popups(layer)
+                popup_enabled = popup_info.get("popup_enabled")
 
                 # Scale visibility
                 min_scale = ""
@@ -488,27 +519,27 @@ def process_layer_file(layer_file_path, relative_path):
 
                 row = [
                     relative_path,
-                    os.path.basename(layer_file_path),
+                    file_name,
                     layer.name,
                     "Feature" if getattr(layer, "isFeatureLayer", False) else "Raster" if getattr(layer, "isRasterLayer", False) else type(layer).__name__,
                     data_source,
                     sym_info.get("symbol_type", ""),
                     ", ".join(sym_info.get("colors", [])[:10]),
-                    "Yes" if sym_info.get("uses_multiple_colors") else "No",
+                    _YN[bool(sym_info.get("uses_multiple_colors"))],
                     sym_info.get("color_notes", ""),
                     ", ".join(sym_info.get("line_widths", [])),
                     sym_info.get("transparency", ""),
                     contrast_issues,
-                    "Yes" if label_info.get("labels_enabled") else "No",
+                    _YN[bool(label_info.get("labels_enabled"))],
                     label_info.get("font_name", ""),
                     label_info.get("font_size", ""),
-                    "Yes" if label_info.get("font_bold") else "No",
+                    _YN[bool(label_info.get("font_bold"))],
                     label_info.get("font_color", ""),
-                    "Yes" if label_info.get("halo_enabled") else "No",
+                    _YN[bool(label_info.get("halo_enabled"))],
                     label_info.get("halo_color", ""),
                     label_info.get("halo_size", ""),
                     label_info.get("label_notes", ""),
-                    "Yes" if popup_info.get("popup_enabled") else ("Unknown" if popup_info.get("popup_enabled") == "" else "No"),
+                    "Unknown" if popup_enabled == "" else _YN[bool(popup_enabled)],
                     len(popup_info.get("popup_fields", [])),
                     ", ".join((popup_info.get("popup_fields") or [])[:10]),
                     min_scale,
@@ -517,16 +548,15 @@ def process_layer_file(layer_file_path, relative_path):
                 ]
 
                 rows.append(row)
-                logging.info("    Extracted: colors={}; labels={}".format(
-                    len(sym_info.get('colors', [])), 
-                    label_info.get('labels_enabled')
-                ))
+                logging.debug("    Extracted: colors=%d; labels=%s",
+                              len(sym_info.get('colors', [])), label_info.get('labels_enabled'))
 
             except Exception as e:
+                had_error = True
                 logging.exception("ERROR processing layer within file: {}".format(getattr(layer, 'name', 'UNKNOWN')))
                 rows.append([
                     relative_path,
-                    os.path.basename(layer_file_path),
+                    file_name,
                     getattr(layer, "name", "UNKNOWN"),
                     "",
                     "ERROR",
@@ -535,10 +565,11 @@ def process_layer_file(layer_file_path, relative_path):
                 ])
 
     except Exception as e:
+        had_error = True
         logging.exception("ERROR processing layer file: {}".format(layer_file_path))
         rows.append([
             relative_path,
-            os.path.basename(layer_file_path),
+            file_name,
             "FILE_ERROR",
             "",
             "ERROR",
@@ -546,7 +577,43 @@ def process_layer_file(layer_file_path, relative_path):
             "Error loading layer file: {}".format(e)
         ])
 
-    return rows
+    return rows, had_error
+
+def _process_one(task):
+    """Worker entry point: (layer_file, relative_path, file_name) -> (rows or None, had_error)"""
+    layer_file, relative_path, file_name = task
+    try:
+        return process_layer_file(layer_file, relative_path, file_name)
+    except Exception:
+        logging.exception("Failed to process: {}".format(layer_file))
+        return None, True
+
+def iter_results(tasks, log_queue):
+    """
+    Yield _process_one's result for each task, in task order. Files are spread across
+    N_WORKERS processes when there is more than one worker and file; if the pool breaks
+    (e.g. a worker can't import arcpy), the remaining files are processed here instead.
+    """
+    if N_WORKERS <= 1 or len(tasks) < 2:
+        yield from map(_process_one, tasks)
+        return
+
+    done = 0
+    broken = False
+    try:
+        with ProcessPoolExecutor(max_workers=min(N_WORKERS, len(tasks)),
+                                 mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(log_queue,)) as executor:
+            for result in executor.map(_process_one, tasks, chunksize=CHUNKSIZE):
+                yield result
+                done += 1
+    except BrokenProcessPool as e:
+        logging.error("Worker pool failed ({}); processing the remaining {} layer files serially".format(
+            e, len(tasks) - done))
+        broken = True
+    # Retried outside the except block so per-file tracebacks don't chain the pool failure
+    if broken:
+        yield from map(_process_one, tasks[done:])
 
 # -----------------------------
 # Main batch extraction
@@ -590,42 +657,44 @@ def extract_batch_baseline_data():
         "Min Scale", "Max Scale", "Extraction Notes"
     ]
     
-    all_rows = []
     processed_count = 0
     error_count = 0
+    total_rows_written = 0
     
-    # Process each layer file
+    # Get relative path and file name for organization, once per file
+    tasks = []
     for layer_file in layer_files:
-        # Get relative path for organization
-        relative_path = os.path.relpath(os.path.dirname(layer_file), LAYER_FILES_ROOT)
+        folder, file_name = os.path.split(layer_file)
+        relative_path = os.path.relpath(folder, LAYER_FILES_ROOT)
         if relative_path == ".":
             relative_path = "Root"
-        
-        try:
-            rows = process_layer_file(layer_file, relative_path)
-            all_rows.extend(rows)
-            processed_count += 1
-            
-            # Check for errors in rows
-            if any("ERROR" in str(row) for row in rows):
-                error_count += 1
-                
-        except Exception as e:
-            logging.exception("Failed to process: {}".format(layer_file))
-            error_count += 1
+        tasks.append((layer_file, relative_path, file_name))
+    
+    # Worker processes log through a queue so their records aren't interleaved
+    log_queue, listener = start_log_listener()
     
-    # Write combined CSV
+    # Write combined CSV, streaming each file's rows out as soon as they are extracted
     try:
-        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        with open(csv_path, "w", newline="", encoding="utf-8", buffering=CSV_BUFFER_SIZE) as f:
             writer = csv.writer(f)
             writer.writerow(headers)
-            writer.writerows(all_rows)
+            
+            # Process the layer files (in parallel when N_WORKERS > 1)
+            for rows, had_error in iter_results(tasks, log_queue):
+                if rows is None:
+                    error_count += 1
+                    continue
+                
+                writer.writerows(rows)
+                total_rows_written += len(rows)
+                processed_count += 1
+                error_count += had_error
         
         logging.info("="*70)
         logging.info("EXTRACTION COMPLETE")
         logging.info("="*70)
         logging.info("Processed {} layer files".format(processed_count))
-        logging.info("Total layers extracted: {}".format(len(all_rows)))
+        logging.info("Total layers extracted: {}".format(total_rows_written))
         logging.info("Files with errors: {}".format(error_count))
         logging.info("CSV saved to: {}".format(csv_path))
         logging.info("Log saved to: {}".format(log_path))
@@ -634,7 +703,7 @@ def extract_batch_baseline_data():
         print("BATCH EXTRACTION FINISHED")
         print("="*70)
         print("Processed layer files: {}".format(processed_count))
-        print("Total layers extracted: {}".format(len(all_rows)))
+        print("Total layers extracted: {}".format(total_rows_written))
         print("Files with errors: {}".format(error_count))
         print("CSV: {}".format(csv_path))
         print("Log: {}".format(log_path))
@@ -644,6 +713,8 @@ def extract_batch_baseline_data():
         logging.exception("ERROR writing CSV")
         print("ERROR writing CSV: {}".format(e))
         print("Log: {}".format(log_path))
+    finally:
+        listener.stop()
 
 # -----------------------------
 # Run
@@ -16,11 +16,30 @@ import arcpy
 import csv
 import os
 import logging
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from operator import attrgetter
+
+# -----------------------------
+# Configuration
+# -----------------------------
+CSV_BUFFER_SIZE = 1 << 20  # bytes buffered before each write to the output CSV
+# Worker threads analyzing layers. Layers of the open Pro session are not documented as
+# thread-safe, so this is opt-in (1 = analyze layers serially on the calling thread)
+N_THREADS = 1
+
+# Yes/No cell values, indexed by bool
+_YN = ("No", "Yes")
+# Popup Enabled cell values, keyed by analyze_popups' popup_enabled ('' = couldn't tell)
+_POPUP_ENABLED = {True: "Yes", False: "No", "": "Unknown"}
 
 # -----------------------------
 # Helpers: paths & logging
 # -----------------------------
+@lru_cache(maxsize=1)  # probed once per session; the OneDrive candidates can be slow network paths
 def get_desktop_folder():
     home = os.path.expanduser("~")
     candidates = [
@@ -50,25 +69,44 @@ def setup_logging(map_name):
     formatter = logging.Formatter('%(levelname)s | %(message)s')
     console.setFormatter(formatter)
     logging.getLogger('').addHandler(console)
-    logging.info(f"Log started: {log_path}")
+    logging.info("Log started: %s", log_path)
     return log_path
 
 # -----------------------------
 # Color and CIM helpers
 # -----------------------------
+@lru_cache(maxsize=4096)
+def _rgb_to_hex(r, g, b):
+    # if floats 0..1, scale to 0..255
+    if 0.0 <= r <= 1.0 and 0.0 <= g <= 1.0 and 0.0 <= b <= 1.0:
+        r, g, b = r * 255, g * 255, b * 255
+    return "#%02x%02x%02x" % (int(round(r)), int(round(g)), int(round(b)))
+
 def rgb_to_hex(rgb):
     """rgb: iterable of ints or floats (0-255 or 0-1) -> '#rrggbb'"""
     try:
-        r, g, b = rgb[:3]
-        # if floats 0..1, convert
-        if 0.0 <= r <= 1.0 and 0.0 <= g <= 1.0 and 0.0 <= b <= 1.0:
-            r, g, b = int(round(r * 255)), int(round(g * 255)), int(round(b * 255))
-        else:
-            r, g, b = int(round(r)), int(round(g)), int(round(b))
-        return "#{:02x}{:02x}{:02x}".format(r, g, b)
+        # cached per (r, g, b): class-break and unique-value symbols repeat colors heavily
+        return _rgb_to_hex(*rgb[:3])
     except Exception:
         return ""
 
+def hex_to_int(hexc):
+    """'#rrggbb' -> 0xRRGGBB, or None if it isn't a hex color"""
+    try:
+        return int(hexc[1:], 16)
+    except ValueError:
+        return None
+
+def width_to_float(width):
+    """symbol layer width -> float, or None if it isn't numeric"""
+    try:
+        return float(width)
+    except (TypeError, ValueError):
+        return None
+
+# Sentinel default for getattr probes, so a single lookup both tests and fetches
+_MISSING = object()
+
 def safe_get(obj, attr, default=None):
     try:
         return getattr(obj, attr)
@@ -78,11 +116,29 @@ def safe_get(obj, attr, default=None):
         except Exception:
             return default
 
+# Getters for the attributes probed on every symbol and symbol layer
+_get_color = attrgetter("color")
+_get_symbol = attrgetter("symbol")
+_get_symbolLayers = attrgetter("symbolLayers")
+_get_width = attrgetter("width")
+_get_opacity = attrgetter("opacity")
+_get_values = attrgetter("values")
+_get_RGB = attrgetter("RGB")
+
+def _try(getter, obj, default=None):
+    """getter(obj), or default if the attribute is missing or can't be read"""
+    try:
+        return getter(obj)
+    except Exception:
+        # arcpy raises RuntimeError and others, not just AttributeError, for unsupported properties
+        return default
+
 # -----------------------------
 # Analyzer functions
 # -----------------------------
-def analyze_symbology(layer):
+def analyze_symbology(layer, cim=None):
     """
+    cim: the layer's CIM definition (layer.getDefinition("V2")), or None
     Returns dict:
     {
       symbol_type, colors (list hex), uses_multiple_colors (bool),
@@ -96,30 +152,37 @@ def analyze_symbology(layer):
         "color_notes": "",
         "line_widths": [],
         "transparency": "",
-        "sym_notes": ""
+        "sym_notes": "",
+        "_colors_int": []  # colors as 24-bit ints, for the bitwise color checks
     }
+    # Collected colors keep first-seen order; the set makes the duplicate check O(1).
+    # Widths are collected as floats and sorted/formatted once at the end.
+    colors = info["colors"]
+    colors_seen = set()
+    widths = set()
 
     try:
         # Primary approach: layer.symbology (high-level API)
-        if hasattr(layer, "symbology") and layer.symbology is not None:
+        sym = getattr(layer, "symbology", None)
+        if sym is not None:
             try:
-                sym = layer.symbology
                 renderer = safe_get(sym, "renderer")
                 if renderer:
                     info["symbol_type"] = safe_get(renderer, "type") or info["symbol_type"]
                     # SimpleRenderer
                     if info["symbol_type"] == "SimpleRenderer":
                         sym_symbol = safe_get(renderer, "symbol")
-                        if sym_symbol and hasattr(sym_symbol, "color"):
-                            col = safe_get(sym_symbol.color, "RGB", None)
-                            if col:
-                                info["colors"].append(rgb_to_hex(col))
+                        col = _try(_get_RGB, _try(_get_color, sym_symbol))
+                        if col:
+                            hexc = rgb_to_hex(col)
+                            colors_seen.add(hexc)
+                            colors.append(hexc)
                         # Try stroke/width on symbol layers if present
                         try:
-                            for sl in getattr(sym_symbol, "symbolLayers", []) or []:
-                                width = safe_get(sl, "width")
+                            for sl in _try(_get_symbolLayers, sym_symbol) or []:
+                                width = width_to_float(_try(_get_width, sl))
                                 if width:
-                                    info["line_widths"].append(str(width))
+                                    widths.add(width)
                         except Exception:
                             pass
 
@@ -132,31 +195,30 @@ def analyze_symbology(layer):
                             for group in groups:
                                 items = safe_get(group, "items") or []
                                 for item in items:
-                                    s = safe_get(item, "symbol")
-                                    if s and hasattr(s, "color"):
-                                        col = safe_get(s.color, "RGB", None)
-                                        if col:
-                                            hexc = rgb_to_hex(col)
-                                            if hexc not in info["colors"]:
-                                                info["colors"].append(hexc)
+                                    s = _try(_get_symbol, item)
+                                    col = _try(_get_RGB, _try(_get_color, s))
+                                    if col:
+                                        hexc = rgb_to_hex(col)
+                                        if hexc not in colors_seen:
+                                            colors_seen.add(hexc)
+                                            colors.append(hexc)
                                     # try symbolLayers for width
                                     try:
-                                        for sl in getattr(s, "symbolLayers", []) or []:
-                                            width = safe_get(sl, "width")
+                                        for sl in _try(_get_symbolLayers, s) or []:
+                                            width = width_to_float(_try(_get_width, sl))
                                             if width:
-                                                info["line_widths"].append(str(width))
+                                                widths.add(width)
                                     except Exception:
                                         pass
                         except Exception:
                             pass
 
             except Exception as e:
-                logging.debug(f"layer.symbology parsing error for {layer.name}: {e}")
+                logging.debug("layer.symbology parsing error for %s: %s", layer.name, e)
 
         # Fallback: try CIM - this often yields colors, opacities, widths
-        if not info["colors"] or not info["line_widths"] or info["transparency"] == "":
+        if cim is not None and (not colors or not widths or info["transparency"] == ""):
             try:
-                cim = layer.getDefinition("V2")
                 # Opacity: CIM layer may have opacity (0..100)
                 try:
                     opacity = safe_get(cim, "opacity")
@@ -168,75 +230,91 @@ def analyze_symbology(layer):
 
                 # Renderer + symbol
                 cim_renderer = safe_get(cim, "renderer") or safe_get(cim, "Renderer")
-                # sometimes renderer contains 'symbol' attribute
                 if cim_renderer:
+                    # Work list of CIM symbols: the renderer's own symbol, or else
+                    # each symbol in its 'groups' or 'classBreaks', in renderer order
                     cim_symbol = safe_get(cim_renderer, "symbol")
-                    # Many CIM symbols include nested symbol and symbolLayers arrays
-                    def _extract_from_cim_symbol(sym):
+                    if cim_symbol:
+                        stack = [cim_symbol]
+                    else:
+                        groups = safe_get(cim_renderer, "groups") or safe_get(cim_renderer, "classBreaks") or []
+                        stack = [sym for sym in (safe_get(group, "symbol") for group in groups) if sym]
+                        stack.reverse()
+
+                    # Colors and widths accumulate over every symbol, so the walk can't stop
+                    # early; transparency is first-found and stops being probed once set.
+                    # A symbol object shared by several classes is only read the first time.
+                    need_transparency = info["transparency"] == ""
+                    visited = set()
+                    while stack:
+                        sym = stack.pop()
+                        if id(sym) in visited:
+                            continue
+                        visited.add(id(sym))
                         try:
                             # symbolLayers may be an attribute or dict key
                             slayers = safe_get(sym, "symbolLayers") or []
-                            for sl in slayers:
-                                # color: some symbolLayers use 'color' -> { 'values': [r,g,b,a] }
-                                col = None
-                                if hasattr(sl, "color"):
-                                    col_attr = safe_get(sl, "color")
-                                    if hasattr(col_attr, "values"):
-                                        col = col_attr.values
-                                elif isinstance(sl, dict) and "color" in sl and "values" in sl["color"]:
-                                    col = sl["color"]["values"]
+                            # color: some symbolLayers use 'color' -> { 'values': [r,g,b,a] }
+                            # A symbol's layers share one representation: JSON-shaped layers are
+                            # plain dicts, everything else is read by attribute. Pick the reader once.
+                            if slayers and type(slayers[0]) is dict:
+                                fields = [((sl.get("color") or {}).get("values"), sl.get("width"),
+                                           sl.get("opacity") if need_transparency else None)
+                                          for sl in slayers]
+                            else:
+                                fields = [(_try(_get_values, _try(_get_color, sl)), _try(_get_width, sl),
+                                           _try(_get_opacity, sl) if need_transparency else None)
+                                          for sl in slayers]
+                            for col, width, sl_op in fields:
                                 if col:
                                     hexc = rgb_to_hex(col)
-                                    if hexc and hexc not in info["colors"]:
-                                        info["colors"].append(hexc)
+                                    if hexc and hexc not in colors_seen:
+                                        colors_seen.add(hexc)
+                                        colors.append(hexc)
                                 # widths for stroke symbol layers
-                                width = safe_get(sl, "width")
+                                width = width_to_float(width)
                                 if width:
-                                    info["line_widths"].append(str(width))
+                                    widths.add(width)
                                 # some sl have 'opacity' 0..100
-                                sl_op = safe_get(sl, "opacity")
-                                if sl_op is not None and info["transparency"] == "":
+                                if need_transparency and sl_op is not None:
                                     info["transparency"] = str(sl_op)
+                                    need_transparency = False
                         except Exception as ee:
-                            logging.debug(f"Error extracting from cim symbol layers for {layer.name}: {ee}")
-
-                    if cim_symbol:
-                        _extract_from_cim_symbol(cim_symbol)
-                    else:
-                        # sometimes renderer contains 'groups' or 'classBreaks'
-                        try:
-                            groups = safe_get(cim_renderer, "groups") or safe_get(cim_renderer, "classBreaks") or []
-                            for group in groups:
-                                sym = safe_get(group, "symbol")
-                                if sym:
-                                    _extract_from_cim_symbol(sym)
-                        except Exception:
-                            pass
+                            logging.debug("Error extracting from cim symbol layers for %s: %s", layer.name, ee)
             except Exception as e:
-                logging.debug(f"CIM fallback error for {layer.name}: {e}")
+                logging.debug("CIM fallback error for %s: %s", layer.name, e)
 
         # Final notes & checks
+        info["_colors_int"] = [ci for ci in map(hex_to_int, info["colors"]) if ci is not None]
         if len(info["colors"]) >= 2:
-            # simple red/green detection
+            # simple red/green detection in one pass: red channel ff, or red 00 with green ff
             try:
-                has_red = any(c.lower().startswith("#ff") for c in info["colors"])
-                has_green = any(c.lower()[1:3] == "00" and c.lower()[3:5] == "ff" for c in info["colors"])
+                has_red = has_green = False
+                for ci in info["_colors_int"]:
+                    rg = ci >> 8  # 0xRRGG
+                    if rg >> 8 == 0xFF:
+                        has_red = True
+                    elif rg == 0x00FF:
+                        has_green = True
+                    if has_red and has_green:
+                        break
                 if has_red and has_green:
                     info["color_notes"] = "WARNING: Red/green combination detected (color blind issue)"
             except Exception:
                 pass
 
-        # dedupe line widths
-        info["line_widths"] = sorted(set(info["line_widths"]), key=lambda x: float(x) if x.replace('.','',1).isdigit() else x)
+        # line widths, already deduped
+        info["line_widths"] = [format(w, "g") for w in sorted(widths)]
 
     except Exception as e:
         info["sym_notes"] = f"Error analyzing symbology: {e}"
-        logging.exception(f"analyze_symbology failure for {layer.name}")
+        logging.exception("analyze_symbology failure for %s", layer.name)
 
     return info
 
-def analyze_labels(layer):
+def analyze_labels(layer, cim=None):
     """
+    cim: the layer's CIM definition (layer.getDefinition("V2")), or None
     Returns dict:
     {
       labels_enabled, font_name, font_size, font_bold, font_color,
@@ -255,19 +333,20 @@ def analyze_labels(layer):
         "label_notes": ""
     }
     try:
-        # showLabels is common
+        # showLabels is common; a layer without it keeps the False default
+        # (arcpy raises more than AttributeError for unsupported properties, hence the try)
         try:
-            if hasattr(layer, "showLabels"):
-                info["labels_enabled"] = bool(layer.showLabels)
+            info["labels_enabled"] = bool(getattr(layer, "showLabels", False))
         except Exception:
             pass
 
         # labelClasses in high-level API
         try:
-            if hasattr(layer, "labelClasses") and len(layer.labelClasses) > 0:
-                lc = layer.labelClasses[0]
-                if hasattr(lc, "textSymbol"):
-                    ts = lc.textSymbol
+            label_classes = getattr(layer, "labelClasses", _MISSING)
+            if label_classes is not _MISSING and len(label_classes) > 0:
+                lc = label_classes[0]
+                ts = getattr(lc, "textSymbol", _MISSING)
+                if ts is not _MISSING:
                     f = safe_get(ts, "font")
                     if f:
                         info["font_name"] = safe_get(f, "name") or info["font_name"]
@@ -277,26 +356,27 @@ def analyze_labels(layer):
                         info["font_bold"] = bool(safe_get(f, "bold", False))
                     # color
                     col = safe_get(ts, "color")
-                    if col and hasattr(col, "RGB"):
-                        info["font_color"] = rgb_to_hex(col.RGB)
+                    rgb = getattr(col, "RGB", _MISSING) if col else _MISSING
+                    if rgb is not _MISSING:
+                        info["font_color"] = rgb_to_hex(rgb)
                     # halo
                     halo = safe_get(ts, "haloSymbol")
                     if halo:
                         info["halo_enabled"] = True
                         # halo color
-                        if hasattr(halo, "color") and hasattr(halo.color, "RGB"):
-                            info["halo_color"] = rgb_to_hex(halo.color.RGB)
+                        halo_rgb = getattr(getattr(halo, "color", _MISSING), "RGB", _MISSING)
+                        if halo_rgb is not _MISSING:
+                            info["halo_color"] = rgb_to_hex(halo_rgb)
                         # halo size
                         hs = safe_get(halo, "size")
                         if hs is not None:
                             info["halo_size"] = str(hs)
         except Exception as e:
-            logging.debug(f"labelClasses parse error for {layer.name}: {e}")
+            logging.debug("labelClasses parse error for %s: %s", layer.name, e)
 
         # Fallback to CIM for label font/color/halo
-        if info["font_name"] == "" or info["font_size"] == "":
+        if cim is not None and (info["font_name"] == "" or info["font_size"] == ""):
             try:
-                cim = layer.getDefinition("V2")
                 label_classes = safe_get(cim, "labelClasses") or []
                 if label_classes:
                     lc = label_classes[0]
@@ -328,7 +408,7 @@ def analyze_labels(layer):
                             if hs:
                                 info["halo_size"] = str(hs)
             except Exception as e:
-                logging.debug(f"CIM label fallback error for {layer.name}: {e}")
+                logging.debug("CIM label fallback error for %s: %s", layer.name, e)
 
         # Simple accessibility check for font size
         try:
@@ -341,12 +421,17 @@ def analyze_labels(layer):
 
     except Exception as e:
         info["label_notes"] = f"Error analyzing labels: {e}"
-        logging.exception(f"analyze_labels failed for {layer.name}")
+        logging.exception("analyze_labels failed for %s", layer.name)
 
     return info
 
-def analyze_popups(layer):
+# Fields left out of the popup field list; arcpy reports field types in upper case
+_SKIP_FIELD_TYPES = frozenset(("OID", "OID64"))
+_SKIP_FIELD_NAMES = frozenset(("shape", "shape_length", "shape_area", "shape.starea()", "shape.stlength()"))
+
+def analyze_popups(layer, cim=None):
     """
+    cim: the layer's CIM definition (layer.getDefinition("V2")), or None
     Returns:
     {
       popup_enabled(bool or ''), popup_fields(list of names), popup_notes
@@ -358,30 +443,27 @@ def analyze_popups(layer):
         "popup_notes": ""
     }
     try:
-        # high-level API: showPopups (bool)
+        # high-level API: showPopups (bool); left as '' (Unknown) when the layer has none
         try:
-            if hasattr(layer, "showPopups"):
-                info["popup_enabled"] = bool(layer.showPopups)
+            show_popups = getattr(layer, "showPopups", _MISSING)
+            if show_popups is not _MISSING:
+                info["popup_enabled"] = bool(show_popups)
         except Exception:
             pass
 
         # Try to list visible fields from layer.listFields() if available
         try:
-            if hasattr(layer, "listFields"):
-                fields = layer.listFields()
-                visible_names = []
-                for f in fields:
-                    # arcpy Field objects do not have 'visible' — this is a best-effort filter:
-                    #  - we include fields commonly used for popups, exclude shape FID etc.
-                    if f.type.upper() not in ("OID", "OID64") and f.name.lower() not in ("shape", "shape_length", "shape_area"):
-                        visible_names.append(f.name)
-                info["popup_fields"] = visible_names
+            list_fields = getattr(layer, "listFields", _MISSING)
+            if list_fields is not _MISSING:
+                # arcpy Field objects do not have 'visible' — this is a best-effort filter:
+                #  - we include fields commonly used for popups, exclude shape FID etc.
+                info["popup_fields"] = [f.name for f in list_fields()
+                                        if f.type not in _SKIP_FIELD_TYPES and f.name.lower() not in _SKIP_FIELD_NAMES]
         except Exception as e:
-            logging.debug(f"listFields issue for {layer.name}: {e}")
+            logging.debug("listFields issue for %s: %s", layer.name, e)
 
         # Try CIM popup info (popupInfo or popupInfo.display)
         try:
-            cim = layer.getDefinition("V2")
             popup_info = safe_get(cim, "popupInfo") or safe_get(cim, "popupInfo", {})
             if popup_info:
                 # If popupInfo contains 'fieldInfos'
@@ -407,10 +489,13 @@ def analyze_popups(layer):
             info["popup_notes"] = "Popup information not fully accessible programmatically - please verify in Map Properties"
     except Exception as e:
         info["popup_notes"] = f"Error analyzing popups: {e}"
-        logging.exception(f"analyze_popups failed for {layer.name}")
+        logging.exception("analyze_popups failed for %s", layer.name)
 
     return info
 
+# Top 12 bits (first 3 hex digits) of the light colors flagged by estimate_contrast_issues
+_LIGHT_PREFIXES = frozenset({0xFFF, 0x00F})
+
 def estimate_contrast_issues(sym_info, label_info, map_background_hex=""):
     """
     Basic heuristics:
@@ -424,12 +509,9 @@ def estimate_contrast_issues(sym_info, label_info, map_background_hex=""):
         if label_info.get("font_color") and not label_info.get("halo_enabled"):
             issues.append("Labels without halo - check contrast against varied backgrounds")
 
-        # light colors
-        light_colors = ['#ffffff', '#ffff00', '#00ffff', '#ffffe0']
-        for c in sym_info.get("colors", []):
-            if c.lower() in light_colors or any(c.lower().startswith(lc[:4]) for lc in light_colors):
-                issues.append("Light symbology color detected - check contrast vs map background")
-                break
+        # light colors: the first 3 hex digits of any of '#ffffff', '#ffff00', '#00ffff', '#ffffe0'
+        if any((ci >> 12) in _LIGHT_PREFIXES for ci in sym_info.get("_colors_int", [])):
+            issues.append("Light symbology color detected - check contrast vs map background")
 
         # transparency concerns
         trans = sym_info.get("transparency")
@@ -443,13 +525,108 @@ def estimate_contrast_issues(sym_info, label_info, map_background_hex=""):
                 pass
 
     except Exception as e:
-        logging.debug(f"estimate_contrast_issues error: {e}")
+        logging.debug("estimate_contrast_issues error: %s", e)
 
     return "; ".join(issues) if issues else ""
 
 # -----------------------------
 # Main extraction
 # -----------------------------
+def layer_error_row(map_name, layer, run_date, message):
+    """CSV row recording a layer that couldn't be audited, so it still shows up in the audit"""
+    try:
+        layer_name = layer.name
+    except Exception:
+        layer_name = "UNKNOWN"
+    return (
+        map_name,
+        layer_name,
+        "",
+        "ERROR",
+        "", "", "", "", "", "", "", "", "", "", "", "", "", "", "", "", "", "", "", "", "", run_date,
+        message
+    )
+
+def process_layer(layer, layer_type, map_name, run_date):
+    """Analyze one feature/raster layer and return its CSV row (an error row if extraction fails)"""
+    try:
+        logging.info("Processing: %s", layer.name)
+
+        # Data source
+        data_source = ""
+        try:
+            data_source = getattr(layer, "dataSource", "")
+        except Exception:
+            data_source = ""
+
+        # CIM definition - fetched once and shared by all analyzers
+        cim = None
+        try:
+            cim = layer.getDefinition("V2")
+        except Exception as e:
+            logging.debug("getDefinition failed for %s: %s", layer.name, e)
+
+        # Symbology
+        sym_info = analyze_symbology(layer, cim)
+
+        # Labels
+        label_info = analyze_labels(layer, cim)
+
+        # Popups
+        popup_info = analyze_popups(layer, cim)
+
+        # Scale visibility
+        min_scale = ""
+        max_scale = ""
+        try:
+            min_scale = str(getattr(layer, "minScale", "")) or ""
+            max_scale = str(getattr(layer, "maxScale", "")) or ""
+        except Exception:
+            pass
+
+        # Estimate contrast issues
+        contrast_issues = estimate_contrast_issues(sym_info, label_info)
+
+        # The analyzers initialize every key, so index them directly
+        colors = sym_info["colors"]
+        popup_fields = popup_info["popup_fields"]
+        row = (
+            map_name,
+            layer.name,
+            layer_type,
+            data_source,
+            sym_info["symbol_type"],
+            ", ".join(colors[:10]),
+            _YN[bool(sym_info["uses_multiple_colors"])],
+            sym_info["color_notes"],
+            ", ".join(sym_info["line_widths"]),
+            sym_info["transparency"],
+            contrast_issues,
+            _YN[bool(label_info["labels_enabled"])],
+            label_info["font_name"],
+            label_info["font_size"],
+            _YN[bool(label_info["font_bold"])],
+            label_info["font_color"],
+            _YN[bool(label_info["halo_enabled"])],
+            label_info["halo_color"],
+            label_info["halo_size"],
+            label_info["label_notes"],
+            _POPUP_ENABLED.get(popup_info["popup_enabled"], "No"),
+            len(popup_fields),
+            ", ".join(popup_fields[:10]),
+            min_scale,
+            max_scale,
+            "; ".join(filter(None, (sym_info["sym_notes"], popup_info["popup_notes"])))
+        )
+
+        logging.info("  ✓ Extracted: colors=%s; labels=%s", len(colors), label_info['labels_enabled'])
+        return row
+
+    except Exception as e:
+        logging.exception("ERROR processing layer: %s", getattr(layer, 'name', 'UNKNOWN'))
+        # Write an error row so you see which layer failed
+        return layer_error_row(map_name, layer, run_date, f"Error during extraction: {e}")
+
 def extract_baseline_data():
     try:
         aprx = arcpy.mp.ArcGISProject("CURRENT")
@@ -467,6 +644,9 @@ def extract_baseline_data():
     desktop = get_desktop_folder()
     csv_fname = f"OSMP_Baseline_{map_name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
     csv_path = os.path.join(desktop, csv_fname)
+    # Built in the local temp folder and moved into place when complete, so a slow or
+    # synced (OneDrive) desktop never sees a partial CSV
+    tmp_csv_path = os.path.join(tempfile.gettempdir(), csv_fname)
 
     headers = [
         "Map Name", "Layer Name", "Layer Type", "Data Source",
@@ -479,108 +659,58 @@ def extract_baseline_data():
         "Min Scale", "Max Scale", "Extraction Notes"
     ]
 
-    rows = []
     layer_count = 0
+    run_date = datetime.now().strftime("%Y-%m-%d")  # stamped on error rows
 
-    logging.info(f"Starting extraction for map: {map_name}")
-    for layer in current_map.listLayers():
-        try:
-            # Skip group or basemap layers if desired
-            try:
-                if getattr(layer, "isGroupLayer", False):
-                    logging.info(f"Skipping group layer: {layer.name}")
-                    continue
-            except Exception:
-                pass
-
-            # Only consider feature or raster layers (skip tables, services w/out layers, etc.)
-            if not (getattr(layer, "isFeatureLayer", False) or getattr(layer, "isRasterLayer", False)):
-                logging.info(f"Skipping non-feature/non-raster layer: {layer.name} ({type(layer)})")
-                continue
-
-            layer_count += 1
-            logging.info(f"Processing: {layer.name}")
-
-            # Data source
-            data_source = ""
-            try:
-                data_source = layer.dataSource if hasattr(layer, "dataSource") else ""
-            except Exception:
-                data_source = ""
-
-            # Symbology
-            sym_info = analyze_symbology(layer)
-
-            # Labels
-            label_info = analyze_labels(layer)
-
-            # Popups
-            popup_info = analyze_popups(layer)
-
-            # Scale visibility
-            min_scale = ""
-            max_scale = ""
-            try:
-                min_scale = str(getattr(layer, "minScale", "")) or ""
-                max_scale = str(getattr(layer, "maxScale", "")) or ""
-            except Exception:
-                pass
-
-            # Estimate contrast issues
-            contrast_issues = estimate_contrast_issues(sym_info, label_info)
-
-            row = [
-                map_name,
-                layer.name,
-                "Feature" if getattr(layer, "isFeatureLayer", False) else "Raster" if getattr(layer, "isRasterLayer", False) else type(layer).__name__,
-                data_source,
-                sym_info.get("symbol_type", ""),
-                ", ".join(sym_info.get("colors", [])[:10]),
-                "Yes" if sym_info.get("uses_multiple_colors") else "No",
-                sym_info.get("color_notes", ""),
-                ", ".join(sym_info.get("line_widths", [])),
-                sym_info.get("transparency", ""),
-                contrast_issues,
-                "Yes" if label_info.get("labels_enabled") else "No",
-                label_info.get("font_name", ""),
-                label_info.get("font_size", ""),
-                "Yes" if label_info.get("font_bold") else "No",
-                label_info.get("font_color", ""),
-                "Yes" if label_info.get("halo_enabled") else "No",
-                label_info.get("halo_color", ""),
-                label_info.get("halo_size", ""),
-                label_info.get("label_notes", ""),
-                "Yes" if popup_info.get("popup_enabled") else ("Unknown" if popup_info.get("popup_enabled") == "" else "No"),
-                len(popup_info.get("popup_fields", [])),
-                ", ".join((popup_info.get("popup_fields") or [])[:10]),
-                min_scale,
-                max_scale,
-                "; ".join(filter(None, [sym_info.get("sym_notes", ""), popup_info.get("popup_notes", "")]))
-            ]
-
-            rows.append(row)
-            logging.info(f"  ✓ Extracted: colors={len(sym_info.get('colors', []))}; labels={label_info.get('labels_enabled')}")
-
-        except Exception as e:
-            logging.exception(f"ERROR processing layer: {getattr(layer, 'name', 'UNKNOWN')}")
-            # Append an error row so you see which layer failed
-            rows.append([
-                map_name,
-                getattr(layer, "name", "UNKNOWN"),
-                "",
-                "ERROR",
-                "", "", "", "", "", "", "", "", "", "", "", "", "", "", "", "", "", "", "", "", "", datetime.now().strftime("%Y-%m-%d"),
-                f"Error during extraction: {e}"
-            ])
-
-    # Write CSV
+    # Write CSV, streaming each layer's row out as soon as it is extracted
     try:
-        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        with open(tmp_csv_path, "w", newline="", encoding="utf-8", buffering=CSV_BUFFER_SIZE) as f:
             writer = csv.writer(f)
             writer.writerow(headers)
-            writer.writerows(rows)
-        logging.info(f"SUCCESS! Processed {layer_count} layers")
-        logging.info(f"CSV saved to: {csv_path}")
+
+            logging.info("Starting extraction for map: %s", map_name)
+
+            # Classify layers once up front: (layer, "Feature" | "Raster", None) for each layer
+            # to audit, or (layer, None, error row) for a layer that failed classification
+            candidates = []
+            for layer in current_map.listLayers():
+                # A broken layer can raise from any property access, so each layer is
+                # classified on its own and gets an error row instead of aborting the run
+                try:
+                    # Skip group or basemap layers if desired
+                    if getattr(layer, "isGroupLayer", False):
+                        logging.info("Skipping group layer: %s", layer.name)
+                        continue
+                    # Only consider feature or raster layers (skip tables, services w/out layers, etc.)
+                    layer_type = "Feature" if getattr(layer, "isFeatureLayer", False) else "Raster" if getattr(layer, "isRasterLayer", False) else None
+                    if layer_type is None:
+                        logging.info("Skipping non-feature/non-raster layer: %s (%s)", layer.name, type(layer))
+                        continue
+                except Exception as e:
+                    error_row = layer_error_row(map_name, layer, run_date, f"Error during extraction: {e}")
+                    logging.exception("ERROR classifying layer: %s", error_row[1])
+                    candidates.append((layer, None, error_row))
+                    continue
+                candidates.append((layer, layer_type, None))
+
+            def audit_row(candidate):
+                layer, layer_type, error_row = candidate
+                return error_row if error_row is not None else process_layer(layer, layer_type, map_name, run_date)
+
+            # process_layer() returns an error row rather than raising, so every candidate gets a row.
+            # writerows() consumes rows one at a time, so no list of rows is ever built.
+            if N_THREADS <= 1 or len(candidates) < 2:
+                for candidate in candidates:
+                    writer.writerow(audit_row(candidate))
+            else:
+                # Worker threads; map() hands rows back in layer order
+                with ThreadPoolExecutor(max_workers=N_THREADS) as ex:
+                    writer.writerows(ex.map(audit_row, candidates))
+            layer_count = len(candidates)
+        shutil.move(tmp_csv_path, csv_path)
+
+        logging.info("SUCCESS! Processed %s layers", layer_count)
+        logging.info("CSV saved to: %s", csv_path)
         print("\n--- Extraction finished ---")
         print(f"Processed layers: {layer_count}")
         print(f"CSV: {csv_path}")
@@ -588,6 +718,10 @@ def extract_baseline_data():
         print("Note: Some items (complex CIM popups / HTML) may need manual review.")
     except Exception as e:
         logging.exception("ERROR writing CSV")
+        try:
+            os.remove(tmp_csv_path)
+        except OSError:
+            pass
         print(f"ERROR writing CSV: {e}")
         print(f"Log: {log_path}")
 
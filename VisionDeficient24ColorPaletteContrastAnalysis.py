@@ -1,6 +1,14 @@
 import os
-from pathlib import Path
-import colorsys
+from functools import lru_cache
+from itertools import compress
+import numpy as np
+
+# numba is optional: ArcGIS Pro's default environment doesn't ship it
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
 
 # Color palette with names
 COLORS = [
@@ -32,15 +40,19 @@ COLORS = [
     ("#FFFFFF", "White")
 ]
 
+@lru_cache(maxsize=None)
 def hex_to_rgb(hex_color):
     """Convert hex color to RGB tuple (0-255)"""
-    hex_color = hex_color.lstrip('#')
-    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+    # bytes.fromhex parses all six digits in one call; results are cached per hex string
+    return tuple(bytes.fromhex(hex_color.lstrip('#')))
 
 def rgb_to_luminance(r, g, b):
     """Calculate relative luminance according to WCAG standards"""
+    return normalized_rgb_to_luminance(r / 255.0, g / 255.0, b / 255.0)
+
+def normalized_rgb_to_luminance(r, g, b):
+    """Relative luminance of RGB channels already scaled to 0-1"""
     def adjust(c):
-        c = c / 255.0
         if c <= 0.03928:
             return c / 12.92
         else:
@@ -57,6 +69,7 @@ def simulate_color_blindness(r, g, b, cb_type):
     Simulate color blindness using Brettel, Viénot and Mollon (1997) matrices
     
     cb_type: 'deuteranopia', 'protanopia', or 'tritanopia'
+    Returns the simulated color as unrounded 0-1 floats
     """
     # Normalize RGB to 0-1
     r, g, b = r/255.0, g/255.0, b/255.0
@@ -83,13 +96,20 @@ def simulate_color_blindness(r, g, b, cb_type):
         sim_b = 0.0 * r + 0.475 * g + 0.525 * b
     
     else:
-        return (r * 255, g * 255, b * 255)
+        return (r, g, b)
     
-    # Convert back to 0-255
-    return (int(sim_r * 255), int(sim_g * 255), int(sim_b * 255))
+    # Kept as floats: rounding to 0-255 ints would shift ratios near the 3.0 threshold
+    return (sim_r, sim_g, sim_b)
 
+@lru_cache(maxsize=4096)
 def calculate_cb_contrast_ratio(color1, color2, cb_type):
     """Calculate contrast ratio as seen by someone with color blindness"""
+    # Palette pairs come straight from the precomputed color-blindness contrast matrices
+    i = _PALETTE_INDEX.get(color1)
+    j = _PALETTE_INDEX.get(color2)
+    if i is not None and j is not None and cb_type in CB_TYPES:
+        return float(_CB_CONTRAST[CB_TYPES.index(cb_type), i, j])
+    
     rgb1 = hex_to_rgb(color1)
     rgb2 = hex_to_rgb(color2)
     
@@ -98,34 +118,37 @@ def calculate_cb_contrast_ratio(color1, color2, cb_type):
     sim_rgb2 = simulate_color_blindness(*rgb2, cb_type)
     
     # Calculate luminance of simulated colors
-    lum1 = rgb_to_luminance(*sim_rgb1)
-    lum2 = rgb_to_luminance(*sim_rgb2)
+    lum1 = normalized_rgb_to_luminance(*sim_rgb1)
+    lum2 = normalized_rgb_to_luminance(*sim_rgb2)
     
     lighter = max(lum1, lum2)
     darker = min(lum1, lum2)
     
     return (lighter + 0.05) / (darker + 0.05)
 
-def get_cb_accessible(pairings):
+def get_cb_accessible(pairings, cb_contrast=None):
     """
     Filter pairings to only those accessible to all color blind types
+    cb_contrast: (3, N, N) palette contrast ratios per CB_TYPES; defaults to _CB_CONTRAST
     Returns: (accessible_pairs, cb_analysis)
     """
-    cb_accessible = []
+    if cb_contrast is None:
+        cb_contrast = _CB_CONTRAST
+    
+    # Gather every pairing's three ratios at once and check them against AA18 (3.0+)
+    idx1 = [_PALETTE_INDEX[pairing['color1']] for pairing in pairings]
+    idx2 = [_PALETTE_INDEX[pairing['color2']] for pairing in pairings]
+    ratios = cb_contrast[:, idx1, idx2]  # (3, pairings)
+    passes = ratios >= 3.0
+    all_pass_mask = passes.all(axis=0).tolist()
+    
+    # The accessible pairs come straight from the mask; the report still lists every
+    # pairing's per-type ratios, so an analysis entry is built for each one
+    cb_accessible = list(compress(pairings, all_pass_mask))
     cb_analysis = []
+    rows = zip(pairings, *ratios.tolist(), *passes.tolist(), all_pass_mask)
     
-    for pairing in pairings:
-        # Calculate contrast for each type of color blindness
-        deuter_ratio = calculate_cb_contrast_ratio(pairing['color1'], pairing['color2'], 'deuteranopia')
-        prota_ratio = calculate_cb_contrast_ratio(pairing['color1'], pairing['color2'], 'protanopia')
-        trita_ratio = calculate_cb_contrast_ratio(pairing['color1'], pairing['color2'], 'tritanopia')
-        
-        # Check if all types meet AA18 standard (3.0+)
-        deuter_pass = deuter_ratio >= 3.0
-        prota_pass = prota_ratio >= 3.0
-        trita_pass = trita_ratio >= 3.0
-        all_pass = deuter_pass and prota_pass and trita_pass
-        
+    for pairing, deuter_ratio, prota_ratio, trita_ratio, deuter_pass, prota_pass, trita_pass, all_pass in rows:
         analysis = {
             'color1': pairing['color1'],
             'name1': pairing['name1'],
@@ -143,25 +166,42 @@ def get_cb_accessible(pairings):
         }
         
         cb_analysis.append(analysis)
-        
-        if all_pass:
-            cb_accessible.append(pairing)
     
     return cb_accessible, cb_analysis
 
+def color_luminance(color):
+    """Luminance of a hex color: looked up for palette colors, computed for any other"""
+    i = _PALETTE_INDEX.get(color)
+    if i is not None:
+        return float(_LUMINANCE[i])
+    return rgb_to_luminance(*hex_to_rgb(color))
+
+@lru_cache(maxsize=4096)
 def calculate_contrast_ratio(color1, color2):
     """Calculate WCAG contrast ratio between two colors"""
-    rgb1 = hex_to_rgb(color1)
-    rgb2 = hex_to_rgb(color2)
-    
-    lum1 = rgb_to_luminance(*rgb1)
-    lum2 = rgb_to_luminance(*rgb2)
+    lum1 = color_luminance(color1)
+    lum2 = color_luminance(color2)
     
     lighter = max(lum1, lum2)
     darker = min(lum1, lum2)
     
     return (lighter + 0.05) / (darker + 0.05)
 
+# WCAG rating bands for np.digitize: index 0..3 into RATING_NAMES
+RATING_THRESHOLDS = [3.0, 4.5, 7.0]
+RATING_NAMES = ("Fail", "AA18", "AA", "AAA")
+_RATING_LABELS = np.array(RATING_NAMES)
+
+def ratings_for(ratios):
+    """get_contrast_rating for a whole array of ratios at once"""
+    return _RATING_LABELS[np.digitize(ratios, RATING_THRESHOLDS)]
+
+# HTML matrix cells
+SAME_COLOR_CELL = '<td class="same-color">—</td>'
+# Contrast matrix row headers, one per palette color
+ROW_HEADERS = [f'<tr><th class="row-header"><div class="color-swatch" style="background-color: {color};"></div>{name}</th>'
+               for color, name in COLORS]
+
 def get_contrast_rating(ratio):
     """Get WCAG rating for graphical objects (non-text)"""
     # For graphical objects, WCAG 2.1 requires 3:1 minimum
@@ -174,58 +214,183 @@ def get_contrast_rating(ratio):
     else:
         return "Fail"
 
+def srgb_to_linear(rgb):
+    """WCAG sRGB companding of 0-1 channel values: array in, linear float32 out"""
+    rgb = np.asarray(rgb, dtype=np.float32)
+    return np.where(rgb <= 0.03928, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+
+# Linear value for every 8-bit channel, so integer colors are companded by lookup
+_SRGB_TO_LINEAR = srgb_to_linear(np.arange(256) / 255.0)  # float32, 1 KB
+
+def linear_luminance(lin):
+    """Relative luminance of linear RGB held along the last axis of an array"""
+    return 0.2126 * lin[..., 0] + 0.7152 * lin[..., 1] + 0.0722 * lin[..., 2]
+
+def srgb_luminance(rgb):
+    """WCAG relative luminance of 0-255 RGB values held along the last axis of an array"""
+    rgb = np.asarray(rgb)
+    if np.issubdtype(rgb.dtype, np.integer):
+        return linear_luminance(_SRGB_TO_LINEAR[rgb])
+    return linear_luminance(srgb_to_linear(rgb / 255.0))
+
+# COLORS is fixed, so its RGB values and luminances are computed once at load
+_PALETTE_RGB = np.array([hex_to_rgb(color) for color, _ in COLORS], dtype=np.uint8)  # (N, 3)
+_PALETTE_INDEX = {color: i for i, (color, _) in enumerate(COLORS)}
+_LUMINANCE = srgb_luminance(_PALETTE_RGB)
+
+# simulate_color_blindness coefficients as one (type, out channel, in channel) stack
+CB_TYPES = ('deuteranopia', 'protanopia', 'tritanopia')
+CB_MATRICES = np.array([
+    [[0.625, 0.375, 0.0], [0.7, 0.3, 0.0], [0.0, 0.3, 0.7]],        # deuteranopia
+    [[0.567, 0.433, 0.0], [0.558, 0.442, 0.0], [0.0, 0.242, 0.758]],  # protanopia
+    [[0.95, 0.05, 0.0], [0.0, 0.433, 0.567], [0.0, 0.475, 0.525]],    # tritanopia
+], dtype=np.float32)
+
+# WCAG luminance weights for linear R, G, B
+LUM_WEIGHTS = np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+
+def cb_luminance(palette01, M):
+    """
+    Luminance of 0-1 RGB colors (N, 3) as seen through a simulation matrix (3, 3), or a
+    stack of them (T, 3, 3) -> (T, N): simulate, compand and weight in one expression
+    """
+    x = palette01 @ np.swapaxes(M, -1, -2)
+    lin = np.where(x <= 0.03928, x / 12.92, ((x + 0.055) / 1.055) ** 2.4)
+    return lin @ LUM_WEIGHTS
+
+def contrast_ratios(lum):
+    """Pairwise WCAG contrast ratios for luminances along the last axis: (..., N) -> (..., N, N)"""
+    L = lum[..., :, None]
+    R = lum[..., None, :]
+    return (np.maximum(L, R) + 0.05) / (np.minimum(L, R) + 0.05)
+
 def create_contrast_matrix():
-    """Create contrast matrix with all color comparisons"""
-    matrix = []
-    
-    for i, (color1, name1) in enumerate(COLORS):
-        row = []
-        for j, (color2, name2) in enumerate(COLORS):
-            if i == j:
-                ratio = None  # Same color
-            else:
-                ratio = calculate_contrast_ratio(color1, color2)
-            row.append(ratio)
-        matrix.append(row)
+    """
+    Create contrast matrix with all color comparisons
+    Returns an (N, N) float array; the diagonal (same color) is NaN
+    """
+    matrix = contrast_ratios(_LUMINANCE)
+    np.fill_diagonal(matrix, np.nan)  # Same color
     
     return matrix
 
+def _cb_contrast_kernel(rgb, matrices):
+    """
+    Loop form of the color-blindness contrast pipeline, for numba: (N, 3) 0-255 RGB and
+    (T, 3, 3) matrices -> (T, N, N) ratios, with the formulas of cb_luminance and contrast_ratios.
+    """
+    n_types = matrices.shape[0]
+    n = rgb.shape[0]
+    lum = np.empty((n_types, n), dtype=rgb.dtype)
+    for c in prange(n):
+        r = rgb[c, 0] / 255.0
+        g = rgb[c, 1] / 255.0
+        b = rgb[c, 2] / 255.0
+        for k in range(n_types):
+            lin = np.empty(3, dtype=rgb.dtype)
+            for ch in range(3):
+                v = matrices[k, ch, 0] * r + matrices[k, ch, 1] * g + matrices[k, ch, 2] * b
+                if v <= 0.03928:
+                    lin[ch] = v / 12.92
+                else:
+                    lin[ch] = ((v + 0.055) / 1.055) ** 2.4
+            lum[k, c] = 0.2126 * lin[0] + 0.7152 * lin[1] + 0.0722 * lin[2]
+    
+    out = np.empty((n_types, n, n), dtype=rgb.dtype)
+    for i in prange(n):
+        for k in range(n_types):
+            for j in range(n):
+                lighter = max(lum[k, i], lum[k, j])
+                darker = min(lum[k, i], lum[k, j])
+                out[k, i, j] = (lighter + 0.05) / (darker + 0.05)
+    return out
+
+# Below this many colors the NumPy broadcast is already instant and numba's compile isn't worth it
+NUMBA_MIN_COLORS = 200
+
+def cb_contrast_matrices(rgb):
+    """Contrast ratios for every pair of 0-255 RGB colors under each CB_TYPES simulation: (3, N, N)"""
+    if njit is not None and len(rgb) >= NUMBA_MIN_COLORS:
+        return _cb_contrast_jit(np.asarray(rgb, dtype=np.float32), CB_MATRICES)
+    return contrast_ratios(cb_luminance(np.asarray(rgb, dtype=np.float32) / 255.0, CB_MATRICES))
+
+_cb_contrast_jit = njit(parallel=True)(_cb_contrast_kernel) if njit is not None else None
+
+# Contrast ratios for every palette pair under each CB_TYPES simulation: (3, N, N)
+_CB_CONTRAST = cb_contrast_matrices(_PALETTE_RGB)
+
+# Each palette pair once: upper triangle, i < j (the NaN diagonal is never reached)
+_PAIR_I, _PAIR_J = np.triu_indices(len(COLORS), k=1)
+
 def get_accessible_pairings(matrix):
     """Get all color pairings that meet accessibility standards"""
-    pairings = []
-    
-    for i, (color1, name1) in enumerate(COLORS):
-        for j, (color2, name2) in enumerate(COLORS):
-            if i < j:  # Only show each pair once
-                ratio = matrix[i][j]
-                rating = get_contrast_rating(ratio)
-                if rating in ["AA18", "AA", "AAA"]:
-                    pairings.append({
-                        'color1': color1,
-                        'name1': name1,
-                        'color2': color2,
-                        'name2': name2,
-                        'ratio': ratio,
-                        'rating': rating
-                    })
-    
-    # Sort by contrast ratio (highest first)
-    pairings.sort(key=lambda x: x['ratio'], reverse=True)
-    
-    return pairings
-
-def generate_html_report(matrix, output_path):
-    """Generate HTML report with visual contrast matrix and color blindness analysis"""
-    
-    pairings = get_accessible_pairings(matrix)
-    cb_accessible, cb_analysis = get_cb_accessible(pairings)
+    ratios = np.asarray(matrix)[_PAIR_I, _PAIR_J]
+    # Rating index per pair, same thresholds as get_contrast_rating: 0=Fail, 1=AA18, 2=AA, 3=AAA
+    rating_idx = np.digitize(ratios, RATING_THRESHOLDS)
+    keep = np.flatnonzero(rating_idx >= 1)
+    
+    # Sort the kept pairs by contrast ratio (highest first); stable, so ties keep matrix order
+    order = keep[np.argsort(-ratios[keep], kind="stable")]
+    iu, ju, ratios, rating_idx = _PAIR_I[order], _PAIR_J[order], ratios[order], rating_idx[order]
+    
+    return [{
+        'color1': COLORS[i][0],
+        'name1': COLORS[i][1],
+        'color2': COLORS[j][0],
+        'name2': COLORS[j][1],
+        'ratio': float(ratio),
+        'rating': RATING_NAMES[r]
+    } for i, j, ratio, r in zip(iu.tolist(), ju.tolist(), ratios.tolist(), rating_idx.tolist())]
+
+def matrix_cells(matrix):
+    """HTML <td> for every contrast matrix entry, as an (N, N) string array built with NumPy string ops"""
+    matrix = np.asarray(matrix)
+    ratings = ratings_for(matrix)
+    ratios = np.char.mod('%.2f', matrix)
+    cells = np.char.add('<td class="color-cell rating-', ratings)
+    cells = np.char.add(cells, '">')
+    cells = np.char.add(cells, ratios)
+    cells = np.char.add(cells, '<br><small>')
+    cells = np.char.add(cells, ratings)
+    cells = np.char.add(cells, '</small></td>')
+    return np.where(np.isnan(matrix), SAME_COLOR_CELL, cells)  # NaN: same color
+
+# Pass/fail span class and mark for each color blindness result
+_CB_MARKS = {True: ('cb-pass', '✓'), False: ('cb-fail', '✗')}
+
+def render_pairing(analysis, show_indicator):
+    """HTML block for one cb_analysis entry; show_indicator adds 🟢 to pairs that pass for all vision types"""
+    cb_class = "cb-accessible" if analysis['all_cb_pass'] else ""
+    cb_indicator = "🟢 " if show_indicator and analysis['all_cb_pass'] else ""
+    deut_class, deut_mark = _CB_MARKS[analysis['deuteranopia_pass']]
+    prot_class, prot_mark = _CB_MARKS[analysis['protanopia_pass']]
+    trit_class, trit_mark = _CB_MARKS[analysis['tritanopia_pass']]
+    
+    return f"""
+        <div class="pairing {cb_class}">
+            <div class="pairing-colors">
+                {cb_indicator}<div class="color-swatch" style="background-color: {analysis['color1']};"></div>
+                <strong>{analysis['name1']}</strong> ({analysis['color1']})
+                <span style="margin: 0 10px;">↔</span>
+                <div class="color-swatch" style="background-color: {analysis['color2']};"></div>
+                <strong>{analysis['name2']}</strong> ({analysis['color2']})
+            </div>
+            <div>Normal Vision: <strong>{analysis['normal_ratio']:.2f}:1</strong> | Rating: <span class="rating-{analysis['normal_rating']}" style="padding: 2px 6px; border-radius: 3px;">{analysis['normal_rating']}</span></div>
+            <div class="cb-status">
+                <span class="{deut_class}">{deut_mark} Deuteranopia: {analysis['deuteranopia_ratio']:.2f}:1</span> |
+                <span class="{prot_class}">{prot_mark} Protanopia: {analysis['protanopia_ratio']:.2f}:1</span> |
+                <span class="{trit_class}">{trit_mark} Tritanopia: {analysis['tritanopia_ratio']:.2f}:1</span>
+            </div>
+        </div>"""
+
+def write_html_report(write, matrix, pairings, cb_accessible, cb_analysis):
+    """Write the report HTML piece by piece through write (e.g. an open file's write method)"""
     
-    # Calculate percentages
-    total_pairs = len(COLORS) * (len(COLORS) - 1) // 2
+    # Pairing counts for the summary
     cb_count = len(cb_accessible)
     normal_count = len(pairings)
     
-    html = """<!DOCTYPE html>
+    write("""<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
@@ -391,81 +556,40 @@ def generate_html_report(matrix, output_path):
                     <th class="row-header">BG \\\\ FG</th>""".format(
         cb_count=cb_count,
         normal_count=normal_count
-    )
+    ))
     
     # Column headers
     for color, name in COLORS:
-        html += f'<th><div class="color-swatch" style="background-color: {color};"></div>{name}</th>'
-    html += "</tr></thead><tbody>"
-    
-    # Matrix rows
-    for i, (color1, name1) in enumerate(COLORS):
-        html += f'<tr><th class="row-header"><div class="color-swatch" style="background-color: {color1};"></div>{name1}</th>'
-        for j, ratio in enumerate(matrix[i]):
-            if ratio is None:
-                html += '<td class="same-color">—</td>'
-            else:
-                rating = get_contrast_rating(ratio)
-                html += f'<td class="color-cell rating-{rating}">{ratio:.2f}<br><small>{rating}</small></td>'
-        html += '</tr>'
-    
-    html += """</tbody></table>
+        write(f'<th><div class="color-swatch" style="background-color: {color};"></div>{name}</th>')
+    write("</tr></thead><tbody>")
+    
+    # Matrix rows, joined into one string from the vectorized cell strings
+    write("".join(
+        row_header + "".join(row) + "</tr>"
+        for row_header, row in zip(ROW_HEADERS, matrix_cells(matrix).tolist())
+    ))
+    
+    write("""</tbody></table>
     </div>
     
     <div class="pairings-container">
         <h2>🎨 Color Blindness Accessible Pairings</h2>
         <p>Pairings that meet WCAG AA18 standard (≥3.0) for <strong>normal vision AND all color blindness types</strong>:</p>
-"""
+""")
     
-    for analysis in cb_analysis:
-        if analysis['all_cb_pass']:
-            html += f"""
-        <div class="pairing cb-accessible">
-            <div class="pairing-colors">
-                <div class="color-swatch" style="background-color: {analysis['color1']};"></div>
-                <strong>{analysis['name1']}</strong> ({analysis['color1']})
-                <span style="margin: 0 10px;">↔</span>
-                <div class="color-swatch" style="background-color: {analysis['color2']};"></div>
-                <strong>{analysis['name2']}</strong> ({analysis['color2']})
-            </div>
-            <div>Normal Vision: <strong>{analysis['normal_ratio']:.2f}:1</strong> | Rating: <span class="rating-{analysis['normal_rating']}" style="padding: 2px 6px; border-radius: 3px;">{analysis['normal_rating']}</span></div>
-            <div class="cb-status">
-                <span class="cb-pass">✓ Deuteranopia: {analysis['deuteranopia_ratio']:.2f}:1</span> |
-                <span class="cb-pass">✓ Protanopia: {analysis['protanopia_ratio']:.2f}:1</span> |
-                <span class="cb-pass">✓ Tritanopia: {analysis['tritanopia_ratio']:.2f}:1</span>
-            </div>
-        </div>"""
+    write("".join(render_pairing(analysis, False) for analysis in cb_analysis if analysis['all_cb_pass']))
     
-    html += """
+    write("""
     </div>
     
     <div class="pairings-container">
         <h2>📋 All Accessible Pairings (Normal Vision)</h2>
         <p>All {count} color combinations meeting WCAG AA18 or better (≥3.0) for normal vision:</p>
-    """.format(count=len(pairings))
+    """.format(count=len(pairings)))
     
-    for analysis in cb_analysis:
-        cb_class = "cb-accessible" if analysis['all_cb_pass'] else ""
-        cb_indicator = "🟢 " if analysis['all_cb_pass'] else ""
-        
-        html += f"""
-        <div class="pairing {cb_class}">
-            <div class="pairing-colors">
-                {cb_indicator}<div class="color-swatch" style="background-color: {analysis['color1']};"></div>
-                <strong>{analysis['name1']}</strong> ({analysis['color1']})
-                <span style="margin: 0 10px;">↔</span>
-                <div class="color-swatch" style="background-color: {analysis['color2']};"></div>
-                <strong>{analysis['name2']}</strong> ({analysis['color2']})
-            </div>
-            <div>Normal Vision: <strong>{analysis['normal_ratio']:.2f}:1</strong> | Rating: <span class="rating-{analysis['normal_rating']}" style="padding: 2px 6px; border-radius: 3px;">{analysis['normal_rating']}</span></div>
-            <div class="cb-status">
-                <span class="{'cb-pass' if analysis['deuteranopia_pass'] else 'cb-fail'}">{'✓' if analysis['deuteranopia_pass'] else '✗'} Deuteranopia: {analysis['deuteranopia_ratio']:.2f}:1</span> |
-                <span class="{'cb-pass' if analysis['protanopia_pass'] else 'cb-fail'}">{'✓' if analysis['protanopia_pass'] else '✗'} Protanopia: {analysis['protanopia_ratio']:.2f}:1</span> |
-                <span class="{'cb-pass' if analysis['tritanopia_pass'] else 'cb-fail'}">{'✓' if analysis['tritanopia_pass'] else '✗'} Tritanopia: {analysis['tritanopia_ratio']:.2f}:1</span>
-            </div>
-        </div>"""
+    write("".join(render_pairing(analysis, True) for analysis in cb_analysis))
     
-    html += f"""
+    write(f"""
     </div>
     
     <div class="pairings-container">
@@ -481,43 +605,61 @@ def generate_html_report(matrix, output_path):
         <div class="code-output">
 # Color blindness accessible pairs ({len(cb_accessible)} pairs)
 CONTRAST_PAIRS_CB_SAFE = [
-"""
+""")
     
     # Generate Python tuple list for CB-safe pairs
     for i, analysis in enumerate(cb_analysis):
         if analysis['all_cb_pass']:
             color1_clean = analysis['color1'].lstrip('#').upper()
             color2_clean = analysis['color2'].lstrip('#').upper()
-            html += f'    ("{color1_clean}", "{color2_clean}")'
+            write(f'    ("{color1_clean}", "{color2_clean}")')
             if i < len([a for a in cb_analysis if a['all_cb_pass']]) - 1:
-                html += ','
-            html += '\n'
+                write(',')
+            write('\n')
     
-    html += """]
+    write("""]
 
 # All accessible pairs - normal vision ({len(pairings)} pairs)  
 CONTRAST_PAIRS_ALL = [
-"""
+""")
     
     for i, analysis in enumerate(cb_analysis):
         color1_clean = analysis['color1'].lstrip('#').upper()
         color2_clean = analysis['color2'].lstrip('#').upper()
-        html += f'    ("{color1_clean}", "{color2_clean}")'
+        write(f'    ("{color1_clean}", "{color2_clean}")')
         if i < len(cb_analysis) - 1:
-            html += ','
-        html += '\n'
+            write(',')
+        write('\n')
     
-    html += """]
+    write("""]
         </div>
     </div>
     
 </body>
-</html>""".format(len=len)
+</html>""".format(len=len))
+
+def generate_html_report(matrix, output_path, pairings=None, cb_results=None):
+    """
+    Generate HTML report with visual contrast matrix and color blindness analysis
+    pairings and cb_results ((cb_accessible, cb_analysis)) are computed here unless passed in
+    Returns the report HTML
+    """
+    
+    if pairings is None:
+        pairings = get_accessible_pairings(matrix)
+    if cb_results is None:
+        cb_results = get_cb_accessible(pairings)
+    cb_accessible, cb_analysis = cb_results
     
+    # Collect the fragments in a list and join once, rather than growing one string with +=
+    parts = []
+    write_html_report(parts.append, matrix, pairings, cb_accessible, cb_analysis)
+    html_content = ''.join(parts)
     with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html)
+        f.write(html_content)
     
     print(f"✓ HTML report generated: {output_path}")
+    return html_content
 
 def display_html_in_notebook(html_content):
     """Display HTML content directly in Jupyter notebook"""
@@ -570,13 +712,11 @@ def main(output_dir=None, display_in_notebook=True):
     # Generate HTML report
     print("\nGenerating HTML report...")
     html_path = os.path.join(output_dir, "VisionDeficient24ColorPalette_ContrastReport.html")
-    generate_html_report(matrix, html_path)
+    html_content = generate_html_report(matrix, html_path, pairings, (cb_accessible, cb_analysis))
     
     # Display in notebook if requested
     if display_in_notebook:
         print("\nDisplaying contrast report in notebook...")
-        with open(html_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
         if display_html_in_notebook(html_content):
             print("  ✓ Report displayed below")
         else:
@@ -13,11 +13,56 @@ import sqlite3
 import os
 import json
 import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+# orjson parses and serializes symbol JSON several times faster than the stdlib, but
+# ArcGIS Pro's default environment doesn't ship it, so fall back to json when missing.
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so handlers work either way.
+try:
+    import orjson
+
+    json_loads = orjson.loads
+
+    def json_dumps(obj):
+        return orjson.dumps(obj).decode()
+except ImportError:
+    json_loads = json.loads
+    json_dumps = json.dumps
 
 # Paths
 template_style_path = r"Y:\TessUniqueSymbols.stylx"
 output_style_path   = r"Y:\VisionDeficient24ColorPalette.stylx"
 
+# Worker processes building pair rows (1 = build in this process). Opt-in: building a pair
+# is a string join, so sending the rows back costs more than it saves, and in an ArcGIS Pro
+# notebook the spawned workers can't import this script's functions at all
+N_WORKERS = 1
+
+# SQLite settings for the bulk load. The output style is regenerated from scratch on every
+# run, so it trades per-transaction fsyncs for speed. No WAL: the style lives on a network
+# drive, where SQLite's shared-memory wal-index doesn't work, and the load is a single
+# transaction anyway. The exclusive lock is taken before the journal mode is set, and
+# journal_mode goes back to DELETE before closing so ArcGIS Pro gets a plain .stylx.
+OUTPUT_PRAGMAS = (
+    "PRAGMA locking_mode=EXCLUSIVE",
+    "PRAGMA journal_mode=TRUNCATE",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",  # 64 MB page cache
+)
+# The template is only read, so it keeps its journal mode and normal locking
+TEMPLATE_PRAGMAS = (
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+)
+
+INSERT_ITEM_SQL = """
+    INSERT INTO ITEMS (CLASS, CATEGORY, NAME, TAGS, CONTENT, KEY)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
 # Palette colors and names
 PALETTE_COLORS = [
     "#003D30", "#005745", "#00735C", "#009175",
@@ -39,8 +84,8 @@ COLOR_NAMES = {
     "000000": "Black", "FFFFFF": "White"
 }
 
-# 135 contrast pairs
-CONTRAST_PAIRS = [
+# Contrast pairs, deduplicated at load (first occurrence wins, order kept)
+CONTRAST_PAIRS = tuple(dict.fromkeys([
     ("000000","FFFFFF"), ("7CFFFA","000000"), ("AFFF2A","000000"), ("FFCFE2","000000"),
     ("5A000F","FFFFFF"), ("450270","FFFFFF"), ("00F407","000000"), ("00E5F8","000000"),
     ("003D30","FFFFFF"), ("7CFFFA","5A000F"), ("5A000F","AFFF2A"), ("450270","7CFFFA"),
@@ -79,19 +124,22 @@ CONTRAST_PAIRS = [
     ("A700FC","00D302"), ("7E0018","009175"), ("00C2F9","EF0096"), ("A40122","009175"),
     ("009175","00C2F9"), ("8400CD","009FFA"), ("CD022D","00C2F9"), ("00735C","009FFA"),
     ("AFFF2A","EF0096")
-]
+]))
 
 def hex_to_rgb(hex_color):
     hex_color = hex_color.lstrip("#")
     return [int(hex_color[i:i+2], 16) for i in (0, 2, 4)]
 
+# (r, g, b) for each palette color, keyed like CONTRAST_PAIRS entries ("003D30")
+PALETTE_RGB = {h.lstrip("#").upper(): tuple(hex_to_rgb(h)) for h in PALETTE_COLORS}
+
 def parse_json_content(content):
     """
     Try to parse JSON content, handling multiple JSON objects or malformed data
     """
     # First, try standard JSON parsing
     try:
-        return json.loads(content)
+        return json_loads(content)
     except json.JSONDecodeError as e:
         # If that fails, try to extract the first valid JSON object
         try:
@@ -109,7 +157,7 @@ def parse_json_content(content):
                     if brace_count == 0 and start_pos >= 0:
                         # Found a complete JSON object
                         json_str = content[start_pos:i+1]
-                        return json.loads(json_str)
+                        return json_loads(json_str)
             
             # If we get here, no valid JSON was found
             raise ValueError("No valid JSON object found in content")
@@ -117,46 +165,172 @@ def parse_json_content(content):
             print(f"ERROR parsing JSON: {parse_error}")
             return None
 
-def replace_colors_in_json(symbol_json, color1, color2):
-    """Replace all colors in the JSON with a two-color pair"""
+# Parent-key substrings that mark a color as an outline (color2)
+_OUTLINE_MARKERS = ('outline', 'border', 'stroke')
+
+def locate_color_sites(symbol):
+    """
+    Walk a parsed symbol once and return its color sites, in walk order, as
+    (container, use_color2, alpha) - container["values"] is an [r, g, b, a] color
+    """
+    sites = []
+    # Iterative depth-first walk. Each dict expands, in key order, into its child dicts
+    # followed by its own color check, so sites come out in the same order as a
+    # recursive walk that descends into a key's value before checking the key.
+    # JSON parsing only produces exact dicts and lists, hence the type() checks.
+    # Parent keys are lowercased once, when their children are pushed.
+    stack = [(True, symbol, '')]
+    while stack:
+        is_dict, d, parent_key_lc = stack.pop()
+        if not is_dict:
+            # Color check for d["values"]
+            # Check if this is a color property by looking at parent context
+            is_outline = any(m in parent_key_lc for m in _OUTLINE_MARKERS)
+            
+            # Alternate between color1 and color2 for polygons
+            # Use color1 for fill/first color, color2 for outline/second color
+            sites.append((d, is_outline or len(sites) % 2 == 1, d["values"][3]))
+            continue
+        
+        work = []
+        for k, v in d.items():
+            t = type(v)
+            if t is dict:
+                work.append((True, v, k.lower()))
+            elif t is list:
+                # Handle nested lists
+                k_lc = k.lower()
+                work.extend((True, item, k_lc) for item in v if type(item) is dict)
+                # Handle color values
+                if k == "values" and len(v) == 4:
+                    work.append((False, d, parent_key_lc))
+        stack.extend(reversed(work))
+    return sites
+
+# An integer [r, g, b, a] color as it appears in symbol JSON text
+VALUES_RE = re.compile(r'"values"\s*:\s*\[\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*\]')
+
+def split_color_text(content, sites):
+    """
+    Split template JSON text around its color values so pairs can be written by plain
+    string joins: (segments, slots), or None if the regex matches don't line up one-to-one
+    with the color sites found by the JSON walk
+    """
+    try:
+        json_loads(content)
+    except ValueError:
+        return None  # only recovered by brace matching; keep it on the JSON path
+    matches = list(VALUES_RE.finditer(content))
+    if len(matches) != len(sites):
+        return None
+    segments = []
+    slots = []
+    pos = 0
+    for m, (d, use_color2, _) in zip(matches, sites):
+        if [int(v) for v in m.groups()] != d["values"]:
+            return None
+        segments.append(content[pos:m.start()])
+        slots.append((use_color2, m.group(4)))
+        pos = m.end()
+    segments.append(content[pos:])
+    return segments, slots
+
+def fill_color_text(segments, slots, rgb1_text, rgb2_text):
+    """Rebuild template JSON text with a two-color pair ("r,g,b" strings) in its color slots"""
+    parts = [segments[0]]
+    for (use_color2, alpha), segment in zip(slots, segments[1:]):
+        parts.append(f'"values":[{rgb2_text if use_color2 else rgb1_text},{alpha}]')
+        parts.append(segment)
+    return "".join(parts)
+
+def apply_colors(symbol, sites, rgb1, rgb2):
+    """Write a two-color pair into every color site of a parsed symbol and return its JSON"""
+    for d, use_color2, alpha in sites:
+        d["values"] = [*(rgb2 if use_color2 else rgb1), alpha]
+    return json_dumps(symbol)
+
+def prepare_template_symbol(symbol_json):
+    """Parse a template symbol and locate its color sites: (symbol, sites), or (None, None) if it can't be parsed"""
     try:
         symbol = parse_json_content(symbol_json)
         if symbol is None:
-            return symbol_json
-        
-        color_index = [0]  # Use list to maintain state across recursive calls
-        
-        def replace_in_dict(d, parent_key=None):
-            for k, v in d.items():
-                if isinstance(v, dict):
-                    replace_in_dict(v, k)
-                elif isinstance(v, list):
-                    # Handle nested lists
-                    for item in v:
-                        if isinstance(item, dict):
-                            replace_in_dict(item, k)
-                
-                # Handle color values
-                if k == "values" and isinstance(v, list) and len(v) == 4:
-                    # Check if this is a color property by looking at parent context
-                    is_outline = parent_key and ('outline' in str(parent_key).lower() or 
-                                                 'border' in str(parent_key).lower() or
-                                                 'stroke' in str(parent_key).lower())
-                    
-                    # Alternate between color1 and color2 for polygons
-                    # Use color1 for fill/first color, color2 for outline/second color
-                    if is_outline or color_index[0] % 2 == 1:
-                        d[k] = hex_to_rgb(color2) + [v[3]]
-                    else:
-                        d[k] = hex_to_rgb(color1) + [v[3]]
-                    
-                    color_index[0] += 1
-        
-        replace_in_dict(symbol)
-        return json.dumps(symbol)
+            return None, None
+        return symbol, locate_color_sites(symbol)
     except Exception as e:
         print(f"ERROR replacing colors: {e}")
+        return None, None
+
+def colorless_content(symbol_json, symbol):
+    """
+    The JSON every pair gets for a template symbol with no colors: the template text
+    itself when it is valid JSON, else the symbol recovered by brace matching, serialized
+    """
+    try:
+        json_loads(symbol_json)
         return symbol_json
+    except ValueError:
+        return json_dumps(symbol)
+
+def replace_colors_in_json(symbol_json, color1, color2):
+    """Replace all colors in the JSON with a two-color pair"""
+    symbol, sites = prepare_template_symbol(symbol_json)
+    if symbol is None:
+        return symbol_json
+    try:
+        return apply_colors(symbol, sites, hex_to_rgb(color1), hex_to_rgb(color2))
+    except Exception as e:
+        print(f"ERROR replacing colors: {e}")
+        return symbol_json
+
+# Parsed template symbols, as built in generate_symbols; set in each worker by its initializer
+_templates = []
+
+def set_templates(templates):
+    """Worker initializer: receive the parsed templates once instead of with every pair"""
+    global _templates
+    _templates = templates
+
+def build_rows_for_pair(pair):
+    """Build the ITEMS rows for every template symbol recolored with one contrast pair"""
+    color1, color2 = pair
+    rgb1 = PALETTE_RGB.get(color1) or hex_to_rgb(color1)
+    rgb2 = PALETTE_RGB.get(color2) or hex_to_rgb(color2)
+    name_suffix = f"_{COLOR_NAMES.get(color1,color1)}_{COLOR_NAMES.get(color2,color2)}"
+    key_suffix  = f"_{color1}_{color2}"
+    rgb1_text = ",".join(map(str, rgb1))
+    rgb2_text = ",".join(map(str, rgb2))
+    rows = []
+    for cls, name, tags, content, key, symbol, sites, text_parts in _templates:
+        new_name = f"{name}{name_suffix}"
+        new_key  = f"{key}{key_suffix}"
+        if text_parts is not None:
+            new_content = fill_color_text(*text_parts, rgb1_text, rgb2_text)
+        elif symbol is None:
+            new_content = content
+        else:
+            new_content = apply_colors(symbol, sites, rgb1, rgb2)
+        rows.append((cls, 'VisionDeficient24', new_name, tags, new_content, new_key))
+    return rows
+
+def iter_pair_rows(templates):
+    """
+    Yield the rows for each contrast pair, in CONTRAST_PAIRS order, built in this process or,
+    when N_WORKERS > 1, in worker processes. Falls back to this process when workers can't
+    start (e.g. run from an ArcGIS Pro notebook, whose functions the spawned workers can't import).
+    """
+    done = 0
+    if N_WORKERS > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=N_WORKERS, initializer=set_templates, initargs=(templates,)) as ex:
+                for rows in ex.map(build_rows_for_pair, CONTRAST_PAIRS):
+                    yield rows
+                    done += 1
+            return
+        except BrokenProcessPool:
+            print("Worker processes unavailable; building symbols in this process")
+    set_templates(templates)
+    for pair in CONTRAST_PAIRS[done:]:
+        yield build_rows_for_pair(pair)
 
 def generate_symbols():
     print("="*80)
@@ -170,64 +344,88 @@ def generate_symbols():
         print(f"Output style not found: {output_style_path}")
         return
 
-    # Check for duplicate pairs
-    unique_pairs = list(dict.fromkeys(CONTRAST_PAIRS))
-    if len(unique_pairs) != len(CONTRAST_PAIRS):
-        duplicates = len(CONTRAST_PAIRS) - len(unique_pairs)
-        print(f"⚠ Warning: Found {duplicates} duplicate pair(s) - removing duplicates")
-        print(f"  Original pairs: {len(CONTRAST_PAIRS)}")
-        print(f"  Unique pairs: {len(unique_pairs)}")
-        # Find and show the duplicates
-        seen = set()
-        for pair in CONTRAST_PAIRS:
-            if pair in seen:
-                print(f"  Duplicate: {pair} ({COLOR_NAMES.get(pair[0], pair[0])} + {COLOR_NAMES.get(pair[1], pair[1])})")
-            seen.add(pair)
-        print()
-
-    # Open template and output style SQLite databases
-    template_conn = sqlite3.connect(template_style_path)
+    # Open template and output style SQLite databases. The template is opened read-only;
+    # the output runs in autocommit mode so the load below is one explicit transaction.
+    template_conn = sqlite3.connect(Path(os.path.abspath(template_style_path)).as_uri() + "?mode=ro", uri=True)
     template_cursor = template_conn.cursor()
+    for pragma in TEMPLATE_PRAGMAS:
+        template_cursor.execute(pragma)
 
-    output_conn = sqlite3.connect(output_style_path)
+    output_conn = sqlite3.connect(output_style_path, isolation_level=None)
     output_cursor = output_conn.cursor()
+    for pragma in OUTPUT_PRAGMAS:
+        output_cursor.execute(pragma)
+
+    try:
+        # Clearing, loading and re-indexing ITEMS is one transaction: if the insert fails,
+        # the rollback leaves the output style exactly as it was
+        output_cursor.execute("BEGIN IMMEDIATE")
 
-    # Clear existing items in output style
-    output_cursor.execute("DELETE FROM ITEMS")
-    output_conn.commit()
-    print("Cleared existing items in output style")
-
-    # Read template symbols
-    template_cursor.execute("SELECT CLASS, CATEGORY, NAME, TAGS, CONTENT, KEY FROM ITEMS")
-    template_items = template_cursor.fetchall()
-    print(f"Loaded template symbols: {len(template_items)} items")
-
-    pairs_added = 0
-    total_symbols_created = 0
-    
-    # Use unique pairs only
-    for color1, color2 in unique_pairs:
+        # Drop the plain (non-UNIQUE) ITEMS indexes for the load and rebuild them once at the end,
+        # instead of updating them on every insert. UNIQUE indexes stay, since they enforce the schema.
+        output_cursor.execute(
+            "SELECT name, sql FROM sqlite_master "
+            "WHERE type='index' AND tbl_name='ITEMS' AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%'"
+        )
+        dropped_indexes = output_cursor.fetchall()
+        for index_name, _ in dropped_indexes:
+            output_cursor.execute(f'DROP INDEX "{index_name}"')
+
+        # Clear existing items in output style
+        output_cursor.execute("DELETE FROM ITEMS")
+        print("Cleared existing items in output style")
+
+        # Read template symbols
+        template_cursor.execute("SELECT CLASS, CATEGORY, NAME, TAGS, CONTENT, KEY FROM ITEMS")
+        template_items = template_cursor.fetchall()
+        print(f"Loaded template symbols: {len(template_items)} items")
+
+        # Parse each template symbol and find its color sites once; every pair then only
+        # rewrites those sites and re-serializes. Unparseable symbols are copied as-is, and
+        # colorless ones get the same JSON for every pair, worked out once here.
+        # Symbols whose color values can all be matched in the raw text skip JSON entirely.
+        templates = []
         for cls, cat, name, tags, content, key in template_items:
-            new_name = f"{name}_{COLOR_NAMES.get(color1,color1)}_{COLOR_NAMES.get(color2,color2)}"
-            new_key  = f"{key}_{color1}_{color2}"
-            new_content = replace_colors_in_json(content, color1, color2)
-            
-            try:
-                output_cursor.execute("""
-                    INSERT INTO ITEMS (CLASS, CATEGORY, NAME, TAGS, CONTENT, KEY)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (cls, 'VisionDeficient24', new_name, tags, new_content, new_key))
-                total_symbols_created += 1
-            except sqlite3.Error as db_error:
-                print(f"Database error inserting {new_name}: {db_error}")
-        
-        pairs_added += 1
-        if pairs_added % 10 == 0:
-            print(f"  {pairs_added}/{len(unique_pairs)} contrast pairs processed... ({total_symbols_created} symbols created)")
+            symbol, sites = prepare_template_symbol(content)
+            if symbol is not None and not sites:
+                content = colorless_content(content, symbol)
+                symbol = None
+            text_parts = split_color_text(content, sites) if sites else None
+            templates.append((cls, name, tags, content, key, symbol, sites, text_parts))
+
+        pairs_added = 0
+        total_symbols_created = 0
+        symbols_built = 0
 
-    output_conn.commit()
-    template_conn.close()
-    output_conn.close()
+        # Pairs are recolored in worker processes; SQLite writes stay here, one executemany
+        # per pair as results arrive, then the indexes dropped for the load are rebuilt
+        try:
+            for rows in iter_pair_rows(templates):
+                output_cursor.executemany(INSERT_ITEM_SQL, rows)
+                symbols_built += len(rows)
+                pairs_added += 1
+                if pairs_added % 10 == 0:
+                    print(f"  {pairs_added}/{len(CONTRAST_PAIRS)} contrast pairs processed... ({symbols_built} symbols built)")
+            for _, index_sql in dropped_indexes:
+                output_cursor.execute(index_sql)
+            output_cursor.execute("COMMIT")
+            total_symbols_created = symbols_built
+        except sqlite3.Error as db_error:
+            output_cursor.execute("ROLLBACK")
+            # pairs_added stops at the pair whose executemany failed
+            if pairs_added < len(CONTRAST_PAIRS):
+                color1, color2 = CONTRAST_PAIRS[pairs_added]
+                print(f"Database error inserting symbols for pair {color1}/{color2}: {db_error}")
+            else:
+                print(f"Database error inserting symbols: {db_error}")
+            pairs_added = 0
+    finally:
+        # Any other exception still rolls back and leaves a plain rollback-journal .stylx
+        if output_conn.in_transaction:
+            output_cursor.execute("ROLLBACK")
+        template_conn.close()
+        output_cursor.execute("PRAGMA journal_mode=DELETE")
+        output_conn.close()
 
     print(f"\n✓ Generated {pairs_added} contrast pairs from template symbols")
     print(f"✓ Total symbols created: {total_symbols_created}")
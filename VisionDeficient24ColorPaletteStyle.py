@@ -11,21 +11,28 @@ SETUP:
 import arcpy
 import os
 import sqlite3
-import json
+from functools import lru_cache
 
 # Configuration
 style_path = r"Y:\VisionDeficient24ColorPalette.stylx"
 
-# 26 palette colors
-PALETTE_COLORS = [
-    "#003D30", "#005745", "#00735C", "#009175",
-    "#EF0096", "#FF5AAF", "#FF9DC8", "#FFCFE2",
-    "#450270", "#65019F", "#8400CD", "#A700FC",
-    "#009FFA", "#00C2F9", "#00E5F8", "#7CFFFA",
-    "#5A000F", "#7E0018", "#A40122", "#CD022D",
-    "#00B408", "#00D302", "#00F407", "#AFFF2A",
-    "#000000", "#FFFFFF"
-]
+# SQLite settings for the bulk load. The style is rebuilt from scratch on every run, so it
+# trades per-transaction fsyncs for speed. No WAL: Y:\ is a network drive, where SQLite's
+# shared-memory wal-index doesn't work, and the load is a single transaction anyway. The
+# exclusive lock is taken before the journal mode is set, and journal_mode goes back to
+# DELETE before closing (on failure too) so ArcGIS Pro gets a plain .stylx.
+STYLE_PRAGMAS = (
+    "PRAGMA locking_mode=EXCLUSIVE",
+    "PRAGMA journal_mode=TRUNCATE",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",  # 64 MB page cache
+)
+
+INSERT_ITEM_SQL = """
+    INSERT INTO ITEMS (CLASS, CATEGORY, NAME, TAGS, CONTENT, KEY)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
 
 COLOR_NAMES = {
     "003D30": "Dark_Teal_1", "005745": "Dark_Teal_2", "00735C": "Medium_Teal_1", "009175": "Medium_Teal_2",
@@ -37,6 +44,15 @@ COLOR_NAMES = {
     "000000": "Black", "FFFFFF": "White"
 }
 
+# 26 palette colors, as bare uppercase hex like CONTRAST_PAIRS entries
+PALETTE_HEX = tuple(COLOR_NAMES)
+PALETTE_COLORS = [f"#{h}" for h in PALETTE_HEX]
+
+# [r, g, b] for each palette color, parsed once; shared lists, so callers must not mutate them.
+# All the hex strings are decoded by a single bytes.fromhex call, then split into triples.
+_PALETTE_BYTES = bytes.fromhex("".join(PALETTE_HEX))
+RGB_CACHE = {h: list(_PALETTE_BYTES[i:i+3]) for h, i in zip(PALETTE_HEX, range(0, len(_PALETTE_BYTES), 3))}
+
 # ALL 135 accessible contrast pairs
 CONTRAST_PAIRS = [
     ("000000","FFFFFF"), ("7CFFFA","000000"), ("AFFF2A","000000"), ("FFCFE2","000000"),
@@ -77,87 +93,81 @@ CONTRAST_PAIRS = [
     ("00B408","8400CD"), ("005745","00D302"), ("005745","00B408"), ("003D30","00B408")
 ]
 
+# Symbol CIM JSON. Every symbol has the same structure and only its colors vary, so the
+# JSON is filled in from compact templates (%d per color channel) rather than built as a
+# dict and serialized.
+_FILL_LAYER = '{"type":"CIMSolidFill","enable":true,"color":{"type":"CIMRGBColor","values":[%d,%d,%d,100]}}'
+_OUTLINE_LAYER = ('{"type":"CIMSolidStroke","enable":true,"width":1.0,'
+                  '"color":{"type":"CIMRGBColor","values":[%d,%d,%d,100]}}')
+_POINT_HEAD = ('{"type":"CIMPointSymbol","symbolLayers":[{"type":"CIMVectorMarker","enable":true,"size":10.0,'
+               '"frame":{"xmin":-5.0,"ymin":-5.0,"xmax":5.0,"ymax":5.0},'
+               '"markerGraphics":[{"type":"CIMMarkerGraphic","geometry":{"rings":[[[-5,-5],[-5,5],[5,5],[5,-5],[-5,-5]]]},'
+               '"symbol":{"type":"CIMPolygonSymbol","symbolLayers":[')
+POINT_TMPL = _POINT_HEAD + _FILL_LAYER + ']}}]}]}'
+POINT_OUTLINE_TMPL = _POINT_HEAD + _FILL_LAYER + ',' + _OUTLINE_LAYER + ']}}]}]}'
+LINE_TMPL = ('{"type":"CIMLineSymbol","symbolLayers":[{"type":"CIMSolidStroke","enable":true,"width":2.0,'
+             '"color":{"type":"CIMRGBColor","values":[%d,%d,%d,100]}}]}')
+POLYGON_TMPL = '{"type":"CIMPolygonSymbol","symbolLayers":[' + _FILL_LAYER + ',' + _OUTLINE_LAYER + ']}'
+
 def hex_to_rgb(hex_color):
     """Convert hex to RGB values (0-255)"""
     hex_color = hex_color.lstrip("#")
-    return [int(hex_color[i:i+2], 16) for i in (0, 2, 4)]
+    rgb = RGB_CACHE.get(hex_color.upper())
+    if rgb is None:
+        rgb = list(bytes.fromhex(hex_color))
+    return rgb
+
+@lru_cache(maxsize=None)
+def _point_solid(fill_color):
+    """Create JSON for a point symbol with a fill only"""
+    return POINT_TMPL % tuple(hex_to_rgb(fill_color))
+
+@lru_cache(maxsize=None)
+def _point_outlined(fill_color, outline_color):
+    """Create JSON for a point symbol with a fill and an outline"""
+    return POINT_OUTLINE_TMPL % (*hex_to_rgb(fill_color), *hex_to_rgb(outline_color))
 
 def create_point_symbol_json(fill_color, outline_color=None):
     """Create JSON for a point symbol"""
-    fill_rgb = hex_to_rgb(fill_color)
-    
-    symbol = {
-        "type": "CIMPointSymbol",
-        "symbolLayers": [{
-            "type": "CIMVectorMarker",
-            "enable": True,
-            "size": 10.0,
-            "frame": {"xmin": -5.0, "ymin": -5.0, "xmax": 5.0, "ymax": 5.0},
-            "markerGraphics": [{
-                "type": "CIMMarkerGraphic",
-                "geometry": {"rings": [[[-5,-5],[-5,5],[5,5],[5,-5],[-5,-5]]]},
-                "symbol": {
-                    "type": "CIMPolygonSymbol",
-                    "symbolLayers": [{
-                        "type": "CIMSolidFill",
-                        "enable": True,
-                        "color": {"type": "CIMRGBColor", "values": fill_rgb + [100]}
-                    }]
-                }
-            }]
-        }]
-    }
-    
     if outline_color:
-        outline_rgb = hex_to_rgb(outline_color)
-        symbol["symbolLayers"][0]["markerGraphics"][0]["symbol"]["symbolLayers"].append({
-            "type": "CIMSolidStroke",
-            "enable": True,
-            "width": 1.0,
-            "color": {"type": "CIMRGBColor", "values": outline_rgb + [100]}
-        })
-    
-    return json.dumps(symbol)
+        return _point_outlined(fill_color, outline_color)
+    return _point_solid(fill_color)
 
+@lru_cache(maxsize=None)
 def create_line_symbol_json(color):
     """Create JSON for a line symbol"""
-    rgb = hex_to_rgb(color)
-    
-    symbol = {
-        "type": "CIMLineSymbol",
-        "symbolLayers": [{
-            "type": "CIMSolidStroke",
-            "enable": True,
-            "width": 2.0,
-            "color": {"type": "CIMRGBColor", "values": rgb + [100]}
-        }]
-    }
-    
-    return json.dumps(symbol)
+    return LINE_TMPL % tuple(hex_to_rgb(color))
 
+@lru_cache(maxsize=None)
 def create_polygon_symbol_json(fill_color, outline_color):
     """Create JSON for a polygon symbol"""
-    fill_rgb = hex_to_rgb(fill_color)
-    outline_rgb = hex_to_rgb(outline_color)
-    
-    symbol = {
-        "type": "CIMPolygonSymbol",
-        "symbolLayers": [
-            {
-                "type": "CIMSolidFill",
-                "enable": True,
-                "color": {"type": "CIMRGBColor", "values": fill_rgb + [100]}
-            },
-            {
-                "type": "CIMSolidStroke",
-                "enable": True,
-                "width": 1.0,
-                "color": {"type": "CIMRGBColor", "values": outline_rgb + [100]}
-            }
-        ]
-    }
-    
-    return json.dumps(symbol)
+    return POLYGON_TMPL % (*hex_to_rgb(fill_color), *hex_to_rgb(outline_color))
+
+def _color_row(hex_clean):
+    """ITEMS row for one palette color's point symbol"""
+    return (
+        3,  # Point Symbol
+        'Colors',
+        f"Color_{COLOR_NAMES[hex_clean]}",
+        'color;palette;vision',
+        _point_solid(hex_clean),
+        f"COLOR_{hex_clean}"
+    )
+
+# The 'Colors' category rows never change between runs, so they are built once at import
+PRECOMPUTED_COLOR_ROWS = tuple(_color_row(h) for h in PALETTE_HEX)
+
+def _pair_rows(prepped):
+    """ITEMS rows for one contrast pair: point, line and polygon symbols, in that order"""
+    hash1, hash2, base_name, key_suffix = prepped
+    return (
+        (3, 'VisionDeficient24', f"Point_{base_name}", 'accessible;contrast;point',
+         _point_outlined(hash1, hash2), f"POINT_{key_suffix}"),
+        (4, 'VisionDeficient24', f"Line_{base_name}", 'accessible;contrast;line',
+         create_line_symbol_json(hash1), f"LINE_{key_suffix}"),
+        (5, 'VisionDeficient24', f"Polygon_{base_name}", 'accessible;contrast;polygon',
+         create_polygon_symbol_json(hash1, hash2), f"POLY_{key_suffix}"),
+    )
 
 def main():
     """Create the complete style file"""
@@ -166,6 +176,7 @@ def main():
     print("VisionDeficient24ColorPalette - Style File Creator")
     print("="*80)
     
+    conn = None
     try:
         # Check file exists
         if not os.path.exists(style_path):
@@ -176,111 +187,71 @@ def main():
         
         # Open database
         print(f"\nOpening: {style_path}")
-        conn = sqlite3.connect(style_path)
+        # Autocommit mode, so clearing and reloading ITEMS is the one explicit transaction below
+        conn = sqlite3.connect(style_path, isolation_level=None)
         cursor = conn.cursor()
+        cursor.executescript(";\n".join(STYLE_PRAGMAS) + ";")
+        
+        # Drop the plain (non-UNIQUE) ITEMS indexes for the load and rebuild them once before
+        # COMMIT, instead of updating them on every insert. UNIQUE indexes stay, since they
+        # enforce the schema. DDL is transactional, so a rollback restores them too.
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master "
+            "WHERE type='index' AND tbl_name='ITEMS' AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%'"
+        )
+        dropped_indexes = cursor.fetchall()
         
-        # Clear existing items (optional - comment out to keep existing)
-        cursor.execute("DELETE FROM ITEMS")
-        conn.commit()
+        # Open the transaction, drop the indexes and clear existing items in one script.
+        # (executescript commits any open transaction first, so it is only used here, before
+        # the load, and never between BEGIN and COMMIT.)
+        cursor.executescript(
+            "BEGIN IMMEDIATE;\n"
+            + "".join(f'DROP INDEX IF EXISTS "{index_name}";\n' for index_name, _ in dropped_indexes)
+            + "DELETE FROM ITEMS;"  # optional - remove to keep existing items
+        )
         print("Cleared existing items")
         
         # Add color symbols
-        print(f"\nAdding {len(PALETTE_COLORS)} color symbols...")
-        colors_added = 0
-        
-        for color_hex in PALETTE_COLORS:
-            hex_clean = color_hex.lstrip("#").upper()
-            name = COLOR_NAMES.get(hex_clean, hex_clean)
-            
-            symbol_json = create_point_symbol_json(color_hex)
-            
-            cursor.execute("""
-                INSERT INTO ITEMS (CLASS, CATEGORY, NAME, TAGS, CONTENT, KEY)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                3,  # Point Symbol
-                'Colors',
-                f"Color_{name}",
-                'color;palette;vision',
-                symbol_json,
-                f"COLOR_{hex_clean}"
-            ))
-            colors_added += 1
-            
-            if colors_added % 10 == 0:
-                print(f"  {colors_added}/{len(PALETTE_COLORS)}...")
+        print(f"\nAdding {len(PALETTE_HEX)} color symbols...")
         
-        conn.commit()
+        # No per-row progress output: the whole build takes well under a second, and each
+        # print is a synchronous round trip in an ArcGIS Pro notebook
+        colors_added = len(PRECOMPUTED_COLOR_ROWS)
         print(f"✓ Added {colors_added} colors")
         
         # Add contrast pair symbols
         print(f"\nAdding {len(CONTRAST_PAIRS)} accessible contrast pairs...")
         print("  (Creating point, line, and polygon for each)")
         
-        pairs_added = 0
+        # Per-pair strings, built once and shared by all three symbols
+        pairs_prepped = [
+            (f"#{c1}", f"#{c2}", f"{COLOR_NAMES.get(c1, c1)}_{COLOR_NAMES.get(c2, c2)}", f"{c1}_{c2}")
+            for c1, c2 in CONTRAST_PAIRS
+        ]
+        
+        def row_iter():
+            """Every ITEMS row: colors, then each pair's point, line and polygon"""
+            yield from PRECOMPUTED_COLOR_ROWS
+            for prepped in pairs_prepped:
+                yield from _pair_rows(prepped)
         
-        for pair in CONTRAST_PAIRS:
-            color1 = pair[0]
-            color2 = pair[1]
-            name1 = COLOR_NAMES.get(color1, color1)
-            name2 = COLOR_NAMES.get(color2, color2)
-            base_name = f"{name1}_{name2}"
-            
-            # Point symbol
-            point_json = create_point_symbol_json(f"#{color1}", f"#{color2}")
-            cursor.execute("""
-                INSERT INTO ITEMS (CLASS, CATEGORY, NAME, TAGS, CONTENT, KEY)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                3,
-                'VisionDeficient24',
-                f"Point_{base_name}",
-                'accessible;contrast;point',
-                point_json,
-                f"POINT_{color1}_{color2}"
-            ))
-            
-            # Line symbol
-            line_json = create_line_symbol_json(f"#{color1}")
-            cursor.execute("""
-                INSERT INTO ITEMS (CLASS, CATEGORY, NAME, TAGS, CONTENT, KEY)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                4,
-                'VisionDeficient24',
-                f"Line_{base_name}",
-                'accessible;contrast;line',
-                line_json,
-                f"LINE_{color1}_{color2}"
-            ))
-            
-            # Polygon symbol
-            poly_json = create_polygon_symbol_json(f"#{color1}", f"#{color2}")
-            cursor.execute("""
-                INSERT INTO ITEMS (CLASS, CATEGORY, NAME, TAGS, CONTENT, KEY)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                5,
-                'VisionDeficient24',
-                f"Polygon_{base_name}",
-                'accessible;contrast;polygon',
-                poly_json,
-                f"POLY_{color1}_{color2}"
-            ))
-            
-            pairs_added += 1
-            
-            if pairs_added % 20 == 0:
-                print(f"  {pairs_added}/{len(CONTRAST_PAIRS)}...")
+        # One prepared statement for every row instead of an execute per symbol; rows
+        # are streamed from the generator rather than collected into a list first
+        cursor.executemany(INSERT_ITEM_SQL, row_iter())
+        pairs_added = len(pairs_prepped)
         
-        conn.commit()
+        for _, index_sql in dropped_indexes:
+            cursor.execute(index_sql)
+        cursor.execute("COMMIT")
         print(f"✓ Added {pairs_added} pairs")
         
         # Summary
         cursor.execute("SELECT COUNT(*) FROM ITEMS")
         total = cursor.fetchone()[0]
         
+        cursor.execute("PRAGMA journal_mode=DELETE")
         conn.close()
+        conn = None
         
         print("\n" + "="*80)
         print("SUCCESS!")
@@ -301,6 +272,13 @@ def main():
         print("   4. All accessible color combinations are ready!")
         
     except Exception as e:
+        # Roll back a half-built load so the style keeps its previous items, restore the
+        # default journal mode, and release the exclusive lock
+        if conn is not None:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.execute("PRAGMA journal_mode=DELETE")
+            conn.close()
         print(f"\nERROR: {e}")
         import traceback
         print(traceback.format_exc())